@@ -3,12 +3,16 @@
 from brainframe_qt.util import preimport_hooks
 
 import faulthandler
+import multiprocessing
 
-from brainframe_qt.ui.brainframe_app import BrainFrameApplication
 from brainframe_qt.util import environment
 
 
 def main():
+    # Imported here, as stream decoder processes re-run this module and don't need
+    # the UI
+    from brainframe_qt.ui.brainframe_app import BrainFrameApplication
+
     faulthandler.enable()
 
     environment.set_up_environment()
@@ -19,4 +23,7 @@ def main():
 
 
 if __name__ == '__main__':
+    # Stream decoder processes re-launch this executable when frozen
+    multiprocessing.freeze_support()
+
     main()
@@ -1,5 +1,4 @@
-from collections import deque
-from typing import Deque, Iterator, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from uuid import UUID
 
 import numpy as np
@@ -8,108 +7,340 @@ from brainframe.api.bf_codecs import Detection
 
 DET_TSTAMP_TUPLE = Tuple[Detection, float]
 
+MAX_EXTRAPOLATION = 2
+"""Seconds past a track's latest detection that its position may be extrapolated
+for. Beyond that, the object is assumed to have stopped"""
+VELOCITY_WINDOW = 1
+"""Seconds of a track's recent history that its velocity is averaged over when
+extrapolating"""
+
+
+class _TrackBuffer:
+    """Preallocated, append-only storage for a track's history, oldest first.
+
+    Entries are never modified once written, so any number of DetectionTracks can
+    share a buffer as long as only one of them appends to it.
+    """
+
+    __slots__ = ("tstamps", "coords", "bottom_midpoints", "detections", "size")
+
+    def __init__(self, capacity: int, num_points: int):
+        self.tstamps = np.empty(capacity, dtype=np.float64)
+        self.coords = np.empty((capacity, num_points, 2), dtype=np.int32)
+        self.bottom_midpoints = np.empty((capacity, 2), dtype=np.float64)
+        self.detections: List[Optional[Detection]] = [None] * capacity
+
+        self.size = 0
+        """Number of entries that have been written"""
+
+    @property
+    def capacity(self) -> int:
+        return len(self.tstamps)
+
+    @property
+    def num_points(self) -> int:
+        return self.coords.shape[1]
+
 
 class DetectionTrack:
-    def __init__(self, history=None, max_size=1000):
+    """The history of a single tracked object.
+
+    Timestamps and coordinates are stored column-wise in preallocated NumPy arrays,
+    oldest first. Copies share the arrays with the original, so they are O(1) to
+    make; whichever track appends to a shared buffer's tail first keeps using it,
+    and any other moves its history to a buffer of its own first (copy-on-write).
+    """
+
+    __slots__ = ("_max_size", "_buffer", "_start", "_end")
+
+    _MIN_CAPACITY = 8
+    """Capacity of a new track's buffer. Buffers double in size as they fill"""
+
+    def __init__(self, max_size=1000):
         self._max_size = max_size
-        self._history: Deque[DET_TSTAMP_TUPLE]
-        self._history = history if history else deque(maxlen=self._max_size)
+
+        self._buffer: Optional[_TrackBuffer] = None
+        self._start = 0
+        self._end = 0
+        """The track's history is the slice [_start, _end) of the buffer"""
 
     def __len__(self):
-        return len(self._history)
+        return self._end - self._start
 
     def __iter__(self) -> Iterator[DET_TSTAMP_TUPLE]:
         """
         The 0th index in track should be the latest
 
         """
-        for item in self._history:
-            yield item
+        if self._buffer is None:
+            return
+
+        detections = self._buffer.detections
+        tstamps = self._buffer.tstamps
+        for index in range(self._end - 1, self._start - 1, -1):
+            yield detections[index], float(tstamps[index])
 
     def __repr__(self):
-        if len(self._history):
+        if len(self):
             return f"DetectionTrack(tstamp: {self.latest_tstamp}, " \
                 f"det:{self.latest_det})"
         else:
             return "DetectionTrack()"
 
     def add_detection(self, detection, tstamp):
-        """Pops the oldest (if len is > max size) and inserts the newest
-        to the beginning of the list."""
-        self._history.appendleft((detection, tstamp))
+        """Adds the newest detection to the track, dropping the oldest if the track
+        is over its max size. Detections are expected to be added in timestamp
+        order.
+
+        If the detection has a different number of points than the ones before it,
+        the history is restarted, as their coordinates can't be compared.
+        """
+        coords = np.asarray(detection.coords, dtype=np.int32)
+
+        buffer = self._buffer
+        if buffer is None or buffer.num_points != len(coords):
+            buffer = self._new_buffer(len(coords), keep_history=False)
+        elif self._end != buffer.size or buffer.size == buffer.capacity:
+            # Another track has appended to this buffer, or it's full
+            buffer = self._new_buffer(len(coords), keep_history=True)
+
+        index = buffer.size
+        buffer.tstamps[index] = tstamp
+        buffer.coords[index] = coords
+        buffer.bottom_midpoints[index] = _bottom_midpoint(coords)
+        buffer.detections[index] = detection
+        buffer.size += 1
+
+        self._end = buffer.size
+        if len(self) > self._max_size:
+            self._start += 1
 
     def get_interpolated_detection(self, interp_to_tstamp) -> Detection:
         """
         Returns a Detection codec whose coordinates are between those of the
         detections at tstamp n-1 and n+1, where n is interpolate tstamp
 
+        Prefer interpolate_tracks when interpolating many tracks at once.
 
         :param interp_to_tstamp: The timestamp that we would like to estimate
         the position of the detection at.
         """
-        if len(self._history) == 1:
-            return self._history[0][0]
+        if len(self) == 1:
+            return self.latest_det
 
         if interp_to_tstamp >= self.latest_tstamp:
             return self.latest_det
 
-        recent: DET_TSTAMP_TUPLE = None
-        older: DET_TSTAMP_TUPLE = None
-        for det, tstamp in self:
-            if tstamp > interp_to_tstamp:
-                recent = det, tstamp
-            else:
-                older = det, tstamp
-                break
-
-        # If interp_to_tstamp is older than all detection nodes in the
-        # DetectionTrack, return the most closest DetectionTrack to the
-        # interp_to_tstamp
-        if older is None:
-            return recent[0]
+        [(recent_det, interp_coords)] = interpolate_tracks([self], interp_to_tstamp)
 
-        ratio = 1 - (recent[1] - interp_to_tstamp) / (recent[1] - older[1])
+        # Return a new Detection but the coordinates have been interpolated
+        return Detection(
+            coords=interp_coords.astype(int).tolist(),
+            class_name=recent_det.class_name,
+            children=recent_det.children,
+            attributes=recent_det.attributes,
+            with_identity=recent_det.with_identity,
+            extra_data=recent_det.extra_data,
+            track_id=recent_det.track_id)
 
-        newer_coords = np.array(recent[0].coords)
-        older_coords = np.array(older[0].coords)
-        interp_coords = older_coords + (newer_coords - older_coords) * ratio
+    @property
+    def tstamps(self) -> np.ndarray:
+        """Timestamps of the track's detections, oldest first. Must not be
+        modified"""
+        if self._buffer is None:
+            return np.empty(0, dtype=np.float64)
+        return self._buffer.tstamps[self._start:self._end]
 
-        """
-        The following things should be true (For debugging):
-        assert recent[1] >= interp_to_tstamp >= older[1]
-        assert 0 <= ratio <= 1, ratio
-        assert recent[0] == self.latest_det
-        """
+    @property
+    def coords(self) -> np.ndarray:
+        """Coordinates of the track's detections, oldest first, with the shape
+        (len(track), num_points, 2). Must not be modified"""
+        if self._buffer is None:
+            return np.empty((0, 0, 2), dtype=np.int32)
+        return self._buffer.coords[self._start:self._end]
 
-        # Return a new Detection but the coordinates have been interpolated
-        return Detection(
-            coords=interp_coords.astype(np.int).tolist(),
-            class_name=recent[0].class_name,
-            children=recent[0].children,
-            attributes=recent[0].attributes,
-            with_identity=recent[0].with_identity,
-            extra_data=recent[0].extra_data,
-            track_id=recent[0].track_id)
+    @property
+    def bottom_midpoints(self) -> np.ndarray:
+        """The midpoint of the bottom edge of each of the track's detections, oldest
+        first, with the shape (len(track), 2). Used to draw where the object has
+        been. Must not be modified"""
+        if self._buffer is None:
+            return np.empty((0, 2), dtype=np.float64)
+        return self._buffer.bottom_midpoints[self._start:self._end]
 
     @property
     def class_name(self) -> str:
         """Get the class name for this detection"""
-        return self._history[0][0].class_name
+        return self.latest_det.class_name
 
     @property
     def track_id(self) -> UUID:
         """Get the track_id for this detection"""
-        return self._history[0][0].track_id
+        return self.latest_det.track_id
 
     @property
     def latest_tstamp(self) -> float:
-        return self._history[0][1]
+        return float(self._buffer.tstamps[self._end - 1])
 
     @property
     def latest_det(self) -> Detection:
-        return self._history[0][0]
+        return self._buffer.detections[self._end - 1]
 
     def copy(self) -> 'DetectionTrack':
-        return DetectionTrack(
-            max_size=self._max_size,
-            history=self._history.copy())
+        """Get a snapshot of the track. O(1), as the history is shared until either
+        track is added to"""
+        track = DetectionTrack(max_size=self._max_size)
+
+        track._buffer = self._buffer
+        track._start = self._start
+        track._end = self._end
+
+        return track
+
+    def _detection_at(self, index: int) -> Detection:
+        """Get a detection by its index in the tstamps and coords arrays"""
+        return self._buffer.detections[self._start + index]
+
+    def _new_buffer(self, num_points: int, *, keep_history: bool) -> _TrackBuffer:
+        """Move the track to a new buffer with room to append to
+
+        :param keep_history: Whether to copy the existing history over. Only up to
+            max_size - 1 entries are kept, to leave room for the next one
+        """
+        num_kept = min(len(self), self._max_size - 1) if keep_history else 0
+
+        # Double in size as the track grows, but never hold more than two tracks'
+        # worth, so that moving to a new buffer is amortized O(1)
+        capacity = min(max(2 * (num_kept + 1), self._MIN_CAPACITY),
+                       2 * self._max_size)
+
+        buffer = _TrackBuffer(capacity, num_points)
+        if num_kept:
+            old_buffer = self._buffer
+            old_start = self._end - num_kept
+
+            buffer.tstamps[:num_kept] = old_buffer.tstamps[old_start:self._end]
+            buffer.coords[:num_kept] = old_buffer.coords[old_start:self._end]
+            buffer.bottom_midpoints[:num_kept] = \
+                old_buffer.bottom_midpoints[old_start:self._end]
+            buffer.detections[:num_kept] = \
+                old_buffer.detections[old_start:self._end]
+            buffer.size = num_kept
+
+        self._buffer = buffer
+        self._start = 0
+        self._end = num_kept
+
+        return buffer
+
+
+def _bottom_midpoint(coords: np.ndarray) -> np.ndarray:
+    """The midpoint of the two points of a detection that are closest to the
+    bottom of the frame"""
+    # Stable, so that ties are broken the same way every time
+    bottom_indices = np.argsort(-coords[:, 1], kind="stable")[:2]
+    return coords[bottom_indices].mean(axis=0)
+
+
+def interpolate_tracks(tracks: Sequence[DetectionTrack], interp_to_tstamp: float,
+                       *, extrapolate: bool = False) \
+        -> List[Tuple[Detection, np.ndarray]]:
+    """Estimate where the object of each track was at the given timestamp.
+
+    Each track's coordinates are linearly interpolated between its detections just
+    before and just after the timestamp. Timestamps outside of a track's history use
+    its oldest or latest detection as-is, unless extrapolating. Takes one binary
+    search per track, and one vectorized pass for all tracks with the same number
+    of points.
+
+    :param tracks: Tracks with at least one detection each
+    :param interp_to_tstamp: The timestamp to estimate the positions at
+    :param extrapolate: Whether to estimate positions past a track's latest
+        detection, by continuing at the track's recent velocity for up to
+        MAX_EXTRAPOLATION seconds
+    :return: For each track, in order, the detection whose attributes apply at the
+        timestamp, and a float array of the interpolated coordinates with the shape
+        (num_points, 2). The arrays must not be modified
+    """
+    detections: List[Detection] = []
+    interp_coords: List[Optional[np.ndarray]] = [None] * len(tracks)
+
+    # Coordinates can only be stacked if they have the same number of points, so
+    # tracks are grouped by it. There's usually only one group
+    groups: Dict[int, _InterpolationGroup] = {}
+
+    for position, track in enumerate(tracks):
+        tstamps = track.tstamps
+        coords = track.coords
+
+        # Index of the oldest detection newer than interp_to_tstamp
+        recent_index = int(np.searchsorted(tstamps, interp_to_tstamp, side="right"))
+
+        if recent_index == len(tstamps):
+            # Newer than the whole track
+            recent_index -= 1
+            older_index = recent_index
+            ratio = 0.
+
+            if extrapolate and recent_index > 0:
+                # Continue along the line from the start of the velocity window.
+                # A ratio over 1 extrapolates past the latest detection
+                recent_tstamp = tstamps[recent_index]
+                older_index = min(
+                    int(np.searchsorted(tstamps, recent_tstamp - VELOCITY_WINDOW)),
+                    recent_index - 1
+                )
+                older_tstamp = tstamps[older_index]
+
+                extrapolate_to = min(interp_to_tstamp,
+                                     recent_tstamp + MAX_EXTRAPOLATION)
+                if recent_tstamp > older_tstamp:
+                    ratio = (extrapolate_to - older_tstamp) \
+                        / (recent_tstamp - older_tstamp)
+                else:
+                    older_index = recent_index
+        elif recent_index == 0:
+            # Older than the whole track
+            older_index = recent_index
+            ratio = 0.
+        else:
+            older_index = recent_index - 1
+            recent_tstamp = tstamps[recent_index]
+            older_tstamp = tstamps[older_index]
+            ratio = (interp_to_tstamp - older_tstamp) / (recent_tstamp - older_tstamp)
+
+        num_points = coords.shape[1]
+        group = groups.get(num_points)
+        if group is None:
+            group = groups[num_points] = _InterpolationGroup()
+
+        group.positions.append(position)
+        group.older_coords.append(coords[older_index])
+        group.newer_coords.append(coords[recent_index])
+        group.ratios.append(ratio)
+
+        detections.append(track._detection_at(recent_index))
+
+    for group in groups.values():
+        older_coords = np.stack(group.older_coords)
+        newer_coords = np.stack(group.newer_coords)
+        ratios = np.array(group.ratios)[:, np.newaxis, np.newaxis]
+
+        group_coords = older_coords + (newer_coords - older_coords) * ratios
+
+        for position, track_coords in zip(group.positions, group_coords):
+            interp_coords[position] = track_coords
+
+    return list(zip(detections, interp_coords))
+
+
+class _InterpolationGroup:
+    """The tracks with a given number of points, collected by interpolate_tracks"""
+
+    __slots__ = ("positions", "older_coords", "newer_coords", "ratios")
+
+    def __init__(self):
+        self.positions: List[int] = []
+        self.older_coords: List[np.ndarray] = []
+        self.newer_coords: List[np.ndarray] = []
+        self.ratios: List[float] = []
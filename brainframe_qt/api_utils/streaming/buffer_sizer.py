@@ -0,0 +1,78 @@
+import math
+from collections import deque
+from typing import Deque, Optional
+
+import numpy as np
+
+
+class BufferSizer:
+    """Works out how many frames a stream's SyncedFrameBuffer needs to hold so that
+    frames can wait for the server's results without being dropped.
+
+    Each time a new result arrives, the difference between the newest frame's
+    timestamp and the result's timestamp is recorded. Frames newer than the result
+    have to be buffered until a later result catches up with them, so a high
+    percentile of that lag, converted to frames using the stream's measured frame
+    rate, is how deep the buffer needs to be.
+    """
+
+    LATENCY_PERCENTILE = 95
+    """Percentile of the observed result lag that the buffer should cover"""
+    HEADROOM = 1.25
+    """Multiplier applied to the required depth, to absorb latency spikes"""
+    MIN_LENGTH = 10
+    MAX_LENGTH = 300
+    """Bounds on the target length, in frames"""
+    NUM_LAG_SAMPLES = 200
+    """Number of recent results to take the percentile over"""
+    FRAME_INTERVAL_SMOOTHING = 0.05
+    """Weight of each new sample in the frame interval's moving average"""
+
+    def __init__(self):
+        self._result_lags: Deque[float] = deque(maxlen=self.NUM_LAG_SAMPLES)
+
+        self._frame_interval: Optional[float] = None
+        """Moving average of the time between frames, in seconds"""
+        self._last_frame_tstamp: Optional[float] = None
+
+        self.target_length: Optional[int] = None
+        """Number of frames the buffer should hold. None until enough has been
+        measured"""
+
+    def record_frame(self, frame_tstamp: float) -> None:
+        """Record that a frame was received, to measure the stream's frame rate"""
+        last_frame_tstamp = self._last_frame_tstamp
+        self._last_frame_tstamp = frame_tstamp
+
+        if last_frame_tstamp is None:
+            return
+
+        interval = frame_tstamp - last_frame_tstamp
+        if interval <= 0:
+            return
+
+        if self._frame_interval is None:
+            self._frame_interval = interval
+        else:
+            self._frame_interval += \
+                (interval - self._frame_interval) * self.FRAME_INTERVAL_SMOOTHING
+
+    def record_result(self, status_tstamp: float) -> None:
+        """Record that a new result arrived from the server, and update the target
+        length"""
+        if self._last_frame_tstamp is None:
+            return
+
+        lag = max(self._last_frame_tstamp - status_tstamp, 0)
+        self._result_lags.append(lag)
+
+        self.target_length = self._calculate_target_length()
+
+    def _calculate_target_length(self) -> Optional[int]:
+        if self._frame_interval is None:
+            return None
+
+        lag = np.percentile(self._result_lags, self.LATENCY_PERCENTILE)
+        length = math.ceil(lag / self._frame_interval * self.HEADROOM)
+
+        return min(max(length, self.MIN_LENGTH), self.MAX_LENGTH)
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+
+class CpuMonitor:
+    """Measures how close this process is to the CPU capacity it can actually use.
+
+    Two limits are checked, and the usage reported is for whichever is closer:
+
+    - The cores the process is allowed to run on. CPU time is counted across every
+      thread in the process, including GStreamer's decoding threads.
+    - A single core for the Python threads. They all share the GIL, so they
+      saturate as one core is used up, no matter how many cores are idle.
+      Measuring this needs per-thread CPU times, which are read from /proc on
+      Linux with Python 3.8+. Elsewhere only the first limit is checked.
+    """
+
+    def __init__(self):
+        self._num_cpus = self._usable_cpu_count()
+
+        self._last_wall_time = time.monotonic()
+        self._last_cpu_time = time.process_time()
+
+        self._last_thread_cpu_times: Dict[int, float] = self._thread_cpu_times()
+        """CPU time of each Python thread at the previous sample, by native thread
+        ID"""
+
+    def sample(self) -> float:
+        """Get the CPU usage since the previous sample (or since creation).
+
+        :return: Fraction of the usable CPU capacity that was used, from 0 to 1
+        """
+        wall_time = time.monotonic()
+        cpu_time = time.process_time()
+        thread_cpu_times = self._thread_cpu_times()
+
+        wall_elapsed = wall_time - self._last_wall_time
+        cpu_elapsed = cpu_time - self._last_cpu_time
+        python_cpu_elapsed = sum(
+            # Threads that started since the last sample count from zero. IDs can
+            # be reused, so a thread whose CPU time went back is a new thread
+            thread_cpu_time - self._last_thread_cpu_times.get(thread_id, 0)
+            if thread_cpu_time >= self._last_thread_cpu_times.get(thread_id, 0)
+            else thread_cpu_time
+            for thread_id, thread_cpu_time in thread_cpu_times.items()
+        )
+
+        self._last_wall_time = wall_time
+        self._last_cpu_time = cpu_time
+        self._last_thread_cpu_times = thread_cpu_times
+
+        if wall_elapsed <= 0:
+            return 0
+
+        process_usage = cpu_elapsed / (wall_elapsed * self._num_cpus)
+        python_usage = python_cpu_elapsed / wall_elapsed
+
+        return min(max(process_usage, python_usage), 1)
+
+    @staticmethod
+    def _usable_cpu_count() -> int:
+        """Number of cores this process is allowed to run on"""
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0)) or 1
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def _thread_cpu_times() -> Dict[int, float]:
+        """CPU time used by each running Python thread, by native thread ID. Empty
+        if the platform doesn't report per-thread CPU times"""
+        task_dir = Path("/proc/self/task")
+        if not hasattr(threading, "get_native_id") or not task_dir.is_dir():
+            return {}
+
+        clock_ticks = os.sysconf("SC_CLK_TCK")
+
+        thread_cpu_times = {}
+        for thread in threading.enumerate():
+            try:
+                stat = (task_dir / str(thread.native_id) / "stat").read_text()
+            except (OSError, TypeError):
+                # The thread stopped, or hasn't started yet
+                continue
+
+            # Fields after the thread's name, which is in parentheses and may
+            # contain spaces. utime and stime are the 14th and 15th fields
+            fields = stat[stat.rindex(")") + 2:].split()
+            utime, stime = int(fields[11]), int(fields[12])
+            thread_cpu_times[thread.native_id] = (utime + stime) / clock_ticks
+
+        return thread_cpu_times
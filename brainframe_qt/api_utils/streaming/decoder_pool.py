@@ -0,0 +1,283 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from gstly.stream_reader import StreamStatus
+
+from brainframe_qt.util.decoder_worker import worker_main
+
+
+class DecoderPool:
+    """Runs GstStreamReaders in a pool of worker processes, so that decoding streams
+    scales with the number of cores instead of competing for this process's GIL.
+
+    Decoded frames are written to shared memory by the workers. This process only
+    receives a small message per frame, and maps the frame's memory without copying
+    it. Each stream is assigned to the worker with the fewest streams.
+    """
+
+    CLOSE_TIMEOUT = 5
+    """Seconds that workers are given to stop before they're terminated"""
+
+    def __init__(self, num_workers: Optional[int] = None, *,
+                 max_buffer_mb: int = 1024, min_buffered_frames: int = 30):
+        """
+        :param num_workers: Number of worker processes. Defaults to the number of
+            cores
+        :param max_buffer_mb: Size of this process's frame buffer budget. Bounds
+            the shared memory that each stream's frames are written to
+        :param min_buffered_frames: Number of frames this process's frame buffer
+            holds on to even when they're over budget
+        """
+        self._num_workers = num_workers or os.cpu_count() or 1
+        self._slot_limits = {
+            "max_buffer_bytes": max_buffer_mb * 1024 ** 2,
+            "min_buffered_frames": min_buffered_frames,
+        }
+        """Bounds on the shared memory of each stream, for the workers' FrameSlots"""
+
+        self._workers: List[_DecoderWorker] = []
+        """Worker processes, started as streams are opened"""
+
+        self._workers_lock = Lock()
+
+    def open_stream(self, **stream_reader_kwargs) -> "ProcessStreamReader":
+        """Start decoding a stream in a worker process.
+
+        :param stream_reader_kwargs: Arguments for the worker's GstStreamReader
+        :return: A reader with the same interface as GstStreamReader
+        """
+        with self._workers_lock:
+            if len(self._workers) < self._num_workers:
+                worker = _DecoderWorker()
+                self._workers.append(worker)
+            else:
+                worker = min(self._workers, key=lambda w: w.num_streams)
+
+        return worker.open_stream(stream_reader_kwargs, self._slot_limits)
+
+    def close(self) -> None:
+        """Stop all worker processes. Their streams are closed"""
+        with self._workers_lock:
+            workers = self._workers.copy()
+            self._workers.clear()
+
+        # Workers stop at the same time, instead of one after the other
+        for worker in workers:
+            worker.send("stop")
+
+        deadline = time.monotonic() + self.CLOSE_TIMEOUT
+        for worker in workers:
+            worker.close(timeout=max(deadline - time.monotonic(), 0))
+
+
+class ProcessStreamReader:
+    """Stand-in for a GstStreamReader that is running in a worker process.
+
+    Has the same events and attributes that SyncedStreamReader uses on a
+    GstStreamReader. Frames are numpy arrays backed by shared memory, and must not
+    be modified. The worker reuses a frame's memory once every reference to the
+    array is gone.
+    """
+
+    def __init__(self, stream_key: int, worker: "_DecoderWorker"):
+        self._stream_key = stream_key
+        self._worker = worker
+
+        self.new_frame_event = Event()
+        self.new_status_event = Event()
+
+        self.status = StreamStatus.INITIALIZING
+        self.latest_frame: Optional[Tuple[float, np.ndarray]] = None
+
+        self._closed_event = Event()
+
+        self._slot_memory: Dict[int, SharedMemory] = {}
+        """Shared memory mapped for each of the worker's frame slots for this
+        stream. Mappings are closed once the worker frees their slot, or the stream
+        is closed, and no frame uses them anymore"""
+        self._slots_in_use: Set[int] = set()
+        """Slots with a frame that something still references"""
+        self._memory_lock = Lock()
+        """Guards the mappings, as frames are released from any thread"""
+
+    def close(self) -> None:
+        self._worker.send("close", self._stream_key)
+
+    def wait_until_closed(self, timeout: Optional[float] = None) -> bool:
+        """Ask the worker to close the stream, and wait for it to do so
+
+        :return: False if the timeout was reached first
+        """
+        self.close()
+        return self._closed_event.wait(timeout)
+
+    def _on_status(self, status: StreamStatus) -> None:
+        self.status = status
+        self.new_status_event.set()
+
+    def _on_frame(self, tstamp: float, slot: int, memory_name: str,
+                  shape: Tuple[int, ...]) -> None:
+        with self._memory_lock:
+            memory = self._slot_memory.get(slot)
+            if memory is None or memory.name != memory_name:
+                if memory is not None:
+                    # The worker grew the slot. Its previous frame is gone, as the
+                    # slot was released before being reused
+                    memory.close()
+
+                # Workers share this process's resource tracker, so the memory is
+                # not reported as leaked when the worker unlinks it
+                memory = SharedMemory(name=memory_name)
+                self._slot_memory[slot] = memory
+
+            self._slots_in_use.add(slot)
+
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+
+        # Give the slot back to the worker once nothing uses the frame anymore. The
+        # finalizer also keeps the memory mapped for as long as the frame exists
+        weakref.finalize(frame, self._release_frame, slot, memory)
+
+        self.latest_frame = (tstamp, frame)
+        self.new_frame_event.set()
+
+    def _on_slot_freed(self, slot: int, memory_name: str) -> None:
+        """The worker freed a slot's memory, so there's no use keeping it mapped"""
+        with self._memory_lock:
+            memory = self._slot_memory.get(slot)
+
+            # The slot may have been reused already, with new memory
+            if memory is not None and memory.name == memory_name:
+                del self._slot_memory[slot]
+                memory.close()
+
+    def _on_closed(self) -> None:
+        # Mappings still used by a frame are closed once the frame is gone
+        with self._memory_lock:
+            for slot, memory in self._slot_memory.items():
+                if slot not in self._slots_in_use:
+                    memory.close()
+            self._slot_memory.clear()
+
+        self.status = StreamStatus.CLOSED
+        self.new_status_event.set()
+        self._closed_event.set()
+
+    def _release_frame(self, slot: int, memory: SharedMemory) -> None:
+        """Called once nothing uses a frame anymore"""
+        with self._memory_lock:
+            self._slots_in_use.discard(slot)
+
+            if self._slot_memory.get(slot) is not memory:
+                # The stream was closed in the meantime
+                memory.close()
+                return
+
+        self._worker.release_slot(self._stream_key, slot)
+
+
+class _DecoderWorker:
+    """A worker process, and the thread in this process that receives its
+    messages"""
+
+    def __init__(self):
+        # GStreamer and Qt are not fork-safe
+        context = multiprocessing.get_context("spawn")
+
+        self._connection, worker_connection = context.Pipe()
+        self._send_lock = Lock()
+
+        self._process = context.Process(
+            name="Stream decoder",
+            target=worker_main,
+            args=(worker_connection,),
+            daemon=True,
+        )
+        self._process.start()
+        worker_connection.close()
+
+        self._readers: Dict[int, ProcessStreamReader] = {}
+        self._stream_keys = itertools.count()
+
+        self._receive_thread = Thread(
+            name="Stream decoder receiver",
+            target=self._receive_messages,
+            daemon=True,
+        )
+        self._receive_thread.start()
+
+    @property
+    def num_streams(self) -> int:
+        return len(self._readers)
+
+    def open_stream(self, stream_reader_kwargs: Dict[str, Any],
+                    slot_limits: Dict[str, int]) -> ProcessStreamReader:
+        stream_key = next(self._stream_keys)
+
+        reader = ProcessStreamReader(stream_key, self)
+        self._readers[stream_key] = reader
+
+        self.send("open", stream_key, stream_reader_kwargs, slot_limits)
+
+        return reader
+
+    def send(self, command: str, *args) -> None:
+        """Send a command to the worker process. Commands sent after the worker has
+        stopped are dropped"""
+        with self._send_lock:
+            try:
+                self._connection.send((command, *args))
+            except OSError:
+                pass
+
+    def release_slot(self, stream_key: int, slot: int) -> None:
+        """Let the worker reuse a frame slot"""
+        self.send("release", stream_key, slot)
+
+    def close(self, timeout: float) -> None:
+        """Stop the worker process, terminating it if it takes longer than the
+        timeout"""
+        self.send("stop")
+
+        self._process.join(timeout=timeout)
+        if self._process.is_alive():
+            logging.warning("Stream decoder process did not stop in time. "
+                            "Terminating it")
+            self._process.terminate()
+
+        self._receive_thread.join(timeout=1)
+
+    def _receive_messages(self) -> None:
+        while True:
+            try:
+                message, stream_key, *args = self._connection.recv()
+            except (EOFError, OSError):
+                break
+
+            reader = self._readers.get(stream_key)
+            if reader is None:
+                continue
+
+            if message == "frame":
+                reader._on_frame(*args)
+            elif message == "status":
+                reader._on_status(*args)
+            elif message == "slot_freed":
+                reader._on_slot_freed(*args)
+            elif message == "closed":
+                self._readers.pop(stream_key)
+                reader._on_closed()
+
+        # The worker is gone, so none of its streams will close on their own
+        for reader in self._readers.values():
+            reader._on_closed()
+        self._readers.clear()
@@ -1,33 +1,95 @@
+import itertools
+import math
 import typing
-from threading import RLock
+import weakref
+from bisect import bisect_left
+from threading import Lock, RLock
 from typing import ClassVar, List, Optional
-from weakref import WeakSet
 
 from brainframe_qt.api_utils.streaming.zone_status_frame import \
     ZoneStatusFrame
 from brainframe_qt.ui.resources.config import StreamingSettings
 
 
+class _ShardedCounter:
+    """A counter that many threads can update without contending on a single lock.
+
+    Each updater is assigned one of a fixed number of shards, each with its own
+    lock. Reading the value sums the shards without locking, so it may lag behind
+    updates that are happening concurrently.
+    """
+
+    def __init__(self, num_shards: int = 16):
+        self._shards: List[int] = [0] * num_shards
+        self._shard_locks: List[Lock] = [Lock() for _ in range(num_shards)]
+
+        self._shard_assigner = itertools.count()
+
+    @property
+    def value(self) -> int:
+        return sum(self._shards)
+
+    def assign_shard(self) -> int:
+        """Get the shard that a new updater should use. Shards are handed out
+        round-robin"""
+        return next(self._shard_assigner) % len(self._shards)
+
+    def add(self, shard: int, amount: int) -> None:
+        with self._shard_locks[shard]:
+            self._shards[shard] += amount
+
+
 class SyncedFrameBuffer:
     GUARANTEED_BUFFER_SPACE: int = 30
     """Amount of space each buffer is allocated, even if total is over max"""
 
-    _buffer_lock: ClassVar[RLock] = RLock()
-
-    _instances = WeakSet()  # type: ClassVar[WeakSet[SyncedFrameBuffer]]
+    _total_bytes: ClassVar[_ShardedCounter] = _ShardedCounter()
+    """The size in bytes of the frames held by all buffers combined. Kept up to date
+    as frames are added and removed, so checking it does not depend on the number of
+    buffers, and updating it does not make streams contend with each other
+    """
 
-    _max_buffer_size: ClassVar[int] = 300
-    """The maximum size of the shared frame buffer. This value is given a
+    _max_buffer_bytes: ClassVar[int] = 1024 * 1024 ** 2
+    """The maximum size in bytes of the shared frame buffer. This value is given a
     default for testing purposes but will be overridden by a user-configurable
     setting when run normally.
     """
 
+    _adaptive_sizing: ClassVar[bool] = False
+    """Whether each buffer is sized to the latency of its own stream's results,
+    instead of every stream sharing the budget. Overridden by a user-configurable
+    setting when run normally.
+    """
+
+    _compress_frames: ClassVar[bool] = False
+    """Whether frames are compressed while they wait in the buffer. Overridden by a
+    user-configurable setting when run normally.
+    """
+
+    _legacy_size_checked: ClassVar[bool] = False
+    """Whether a frame_buffer_size setting from an older version has been looked
+    for. See _convert_legacy_buffer_size"""
+    _legacy_size_lock: ClassVar[Lock] = Lock()
+
     def __init__(self):
-        self._buffer: List[ZoneStatusFrame] = []
-        self._instances.add(self)
+        self._buffer_lock = RLock()
+        """Guards this stream's buffer. Never held while touching another stream's"""
+
+        self._buffer = _FrameRing()
+        self._target_length: Optional[int] = None
+        """Length this stream's buffer is sized to when using adaptive sizing"""
+
+        self._counter_shard = self._total_bytes.assign_shard()
+
+        # Frames still held when the buffer is garbage collected no longer count
+        # towards the shared total
+        weakref.finalize(self, self._release_frames,
+                         self._buffer, self._counter_shard)
 
         self.streaming_settings = StreamingSettings()
-        self.set_max_buffer_size(self.streaming_settings.frame_buffer_size)
+        self.set_max_buffer_mb(self.streaming_settings.frame_buffer_mb)
+        self.set_compress_frames(self.streaming_settings.compress_buffered_frames)
+        self.set_adaptive_sizing(self.streaming_settings.adaptive_frame_buffer)
 
         self._init_signals()
 
@@ -38,20 +100,58 @@ class SyncedFrameBuffer:
         self.streaming_settings.value_changed.connect(self._handle_settings_change)
 
     def add_frame(self, frame: ZoneStatusFrame) -> None:
+        """Add the newest frame to the buffer. Frames are expected to be added in
+        timestamp order"""
+        if not self._legacy_size_checked:
+            self._convert_legacy_buffer_size(frame.nbytes)
+
+        if self._compress_frames:
+            frame.compress()
+
         with self._buffer_lock:
             self._buffer.append(frame)
+            self._total_bytes.add(self._counter_shard, frame.nbytes)
 
     @classmethod
-    def set_max_buffer_size(cls, max_size: int) -> None:
+    def set_max_buffer_mb(cls, max_mb: int) -> None:
         """Sets the shared maximum size of the frame buffer.
 
         If this value is decreased during runtime, the buffer will not
         immediately decrease in size. It will slowly decrease as frames are
         removed from the buffer.
 
-        :param max_size: The new buffer size
+        :param max_mb: The new buffer size, in megabytes
+        """
+        cls._max_buffer_bytes = max_mb * 1024 ** 2
+
+    @classmethod
+    def set_adaptive_sizing(cls, adaptive_sizing: bool) -> None:
+        """Sets whether buffers are sized individually using resize().
+
+        When enabled, each stream holds the number of frames it was last resized
+        to, even if the shared budget is exceeded. Streams that have not been
+        resized yet fall back to GUARANTEED_BUFFER_SPACE.
         """
-        cls._max_buffer_size = max_size
+        cls._adaptive_sizing = adaptive_sizing
+
+    @classmethod
+    def set_compress_frames(cls, compress_frames: bool) -> None:
+        """Sets whether frames are stored compressed while they are buffered.
+
+        Compressed frames take a fraction of the memory, so more of them fit in the
+        buffer, but each frame costs a JPEG encode when it is added (and a decode if
+        it is displayed). Frames that are already buffered are not affected.
+        """
+        cls._compress_frames = compress_frames
+
+    def resize(self, target_length: Optional[int]) -> None:
+        """Size this stream's buffer to hold target_length frames. Only takes effect
+        while adaptive sizing is enabled.
+
+        :param target_length: The number of frames to hold, or None to use the
+            default sizing
+        """
+        self._target_length = target_length
 
     @property
     def is_empty(self) -> bool:
@@ -59,11 +159,23 @@ class SyncedFrameBuffer:
 
     @property
     def is_full(self) -> bool:
-        return self._total_length >= self._max_buffer_size
+        if self._total_bytes.value >= self._max_buffer_bytes:
+            return True
+
+        target_length = self._active_target_length
+        return target_length is not None and len(self) >= target_length
 
     @property
     def needs_guaranteed_space(self) -> bool:
-        return len(self) < self.GUARANTEED_BUFFER_SPACE
+        target_length = self._active_target_length
+        if target_length is None:
+            target_length = self.GUARANTEED_BUFFER_SPACE
+
+        return len(self) < target_length
+
+    @property
+    def _active_target_length(self) -> Optional[int]:
+        return self._target_length if self._adaptive_sizing else None
 
     def pop_oldest(self) -> Optional[ZoneStatusFrame]:
         """Pop the oldest frame from this instance's buffer. None if buffer is
@@ -73,24 +185,24 @@ class SyncedFrameBuffer:
                 return None
 
             # Get oldest frame for stream
-            return self._buffer.pop(0)
+            frame = self._buffer.pop_oldest()
+            self._total_bytes.add(self._counter_shard, -frame.nbytes)
+
+            return frame
 
     def pop_until(self, tstamp: float) -> Optional[ZoneStatusFrame]:
         """Pop frames until the provided oldest frame in the buffer is newer
         than the provided tstamp
-        """
-        oldest_frame: Optional[ZoneStatusFrame] = None
 
+        :return: The newest of the popped frames, or None if no frames were popped
+        """
         with self._buffer_lock:
-            while True:
-                popped_frame = self.pop_if_older(tstamp)
-
-                if not popped_frame:
-                    break
+            prev_nbytes = self._buffer.nbytes
+            newest_popped = self._buffer.pop_older_than(tstamp)
+            self._total_bytes.add(self._counter_shard,
+                                  self._buffer.nbytes - prev_nbytes)
 
-                oldest_frame = popped_frame
-
-        return oldest_frame
+        return newest_popped
 
     def pop_if_older(self, tstamp: float) -> Optional[ZoneStatusFrame]:
         """Pop the oldest frame in the buffer if its tstamp is older than the
@@ -104,23 +216,116 @@ class SyncedFrameBuffer:
             if self.is_empty:
                 return None
 
-            oldest_frame = self._buffer[0]
-
-            if oldest_frame.tstamp < tstamp:
-                # Pop the frame from both instance and combined buffers
-                popped_frame = self.pop_oldest()
-                assert oldest_frame is popped_frame
-
-                return popped_frame
+            if self._buffer.oldest_tstamp < tstamp:
+                return self.pop_oldest()
             else:
                 return None
 
-    @property
-    def _total_length(self) -> int:
-        with self._buffer_lock:
-            return sum(map(len, self._instances))
+    def _convert_legacy_buffer_size(self, frame_bytes: int) -> None:
+        """Older versions limited the buffer to a number of frames. Convert a limit
+        the user set that way to megabytes, using the size of the first buffered
+        frame, and remove it so that it's only converted once"""
+        with self._legacy_size_lock:
+            if self._legacy_size_checked:
+                return
+            SyncedFrameBuffer._legacy_size_checked = True
+
+        max_frames = self.streaming_settings.frame_buffer_size
+        if not max_frames:
+            return
+
+        # Updates the budget of every buffer, through the settings change
+        self.streaming_settings.frame_buffer_mb = max(
+            math.ceil(max_frames * frame_bytes / 1024 ** 2), 1)
+        del self.streaming_settings.frame_buffer_size
+
+    @classmethod
+    def _release_frames(cls, buffer: "_FrameRing", counter_shard: int) -> None:
+        cls._total_bytes.add(counter_shard, -buffer.nbytes)
 
     def _handle_settings_change(self, setting: str, value: object):
-        if setting == "frame_buffer_size":
+        if setting == "frame_buffer_mb":
             value = typing.cast(int, value)
-            self.set_max_buffer_size(value)
+            self.set_max_buffer_mb(value)
+        elif setting == "adaptive_frame_buffer":
+            value = typing.cast(bool, value)
+            self.set_adaptive_sizing(value)
+        elif setting == "compress_buffered_frames":
+            value = typing.cast(bool, value)
+            self.set_compress_frames(value)
+
+
+class _FrameRing:
+    """Frames in timestamp order, added to the back and consumed from the front.
+
+    Consumed slots at the front are only reclaimed once they make up half of the
+    list, so all operations are amortized O(1). Timestamps are kept in a parallel
+    list so frames can be located with a bisect.
+    """
+
+    __slots__ = ("_frames", "_tstamps", "_head", "nbytes")
+
+    _MIN_COMPACT_SIZE = 64
+    """Don't bother reclaiming consumed slots for lists smaller than this"""
+
+    def __init__(self):
+        self._frames: List[Optional[ZoneStatusFrame]] = []
+        self._tstamps: List[float] = []
+
+        self._head = 0
+        """Index of the oldest frame. Slots before it have already been consumed"""
+
+        self.nbytes = 0
+        """Combined size of the frames in the ring"""
+
+    def __len__(self) -> int:
+        return len(self._frames) - self._head
+
+    @property
+    def oldest_tstamp(self) -> float:
+        return self._tstamps[self._head]
+
+    def append(self, frame: ZoneStatusFrame) -> None:
+        self._frames.append(frame)
+        self._tstamps.append(frame.tstamp)
+        self.nbytes += frame.nbytes
+
+    def pop_oldest(self) -> ZoneStatusFrame:
+        frame = self._frames[self._head]
+
+        self._consume(self._head + 1)
+
+        return frame
+
+    def pop_older_than(self, tstamp: float) -> Optional[ZoneStatusFrame]:
+        """Pop every frame with a timestamp older than the one provided
+
+        :return: The newest of the popped frames, if any
+        """
+        end = bisect_left(self._tstamps, tstamp, self._head)
+
+        if end == self._head:
+            return None
+
+        newest_popped = self._frames[end - 1]
+
+        self._consume(end)
+
+        return newest_popped
+
+    def _consume(self, end: int) -> None:
+        """Drop references to frames in front of end, and move the head there"""
+        for index in range(self._head, end):
+            self.nbytes -= self._frames[index].nbytes
+            self._frames[index] = None
+        self._head = end
+
+        if self._head == len(self._frames):
+            self._frames.clear()
+            self._tstamps.clear()
+            self._head = 0
+        elif self._head >= self._MIN_COMPACT_SIZE \
+                and self._head * 2 >= len(self._frames):
+            del self._frames[:self._head]
+            del self._tstamps[:self._head]
+            self._head = 0
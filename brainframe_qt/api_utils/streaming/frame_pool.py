@@ -0,0 +1,87 @@
+import weakref
+from threading import Lock
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class FramePool:
+    """Reusable frame buffers for a single stream.
+
+    Frames that a stream produces are all the same shape, so instead of allocating
+    a new array for each one, arrays are handed out from buffers that earlier frames
+    are done with. A buffer goes back to the pool once every reference to its array
+    (and any view of it) is gone, such as when its frame leaves the
+    SyncedFrameBuffer or is replaced on screen. This keeps memory use flat instead
+    of churning the allocator with large, short-lived arrays.
+    """
+
+    MAX_FREE_BUFFERS = 16
+    """Buffers kept for reuse beyond this are freed. Only needs to cover bursts of
+    frames being released at once, as frames are usually released at the rate they
+    are created"""
+
+    def __init__(self):
+        self._free_buffers: Dict[Tuple[int, ...], List[np.ndarray]] = {}
+        """Buffers that are ready for reuse, by the shape of the frames they hold"""
+
+        self._lock = Lock()
+        """Frames are released from whichever thread drops them last"""
+
+    def empty(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Get an uninitialized uint8 array, like np.empty(shape, dtype=np.uint8).
+        Meant to be written to with np.copyto or a NumPy function's out= argument.
+
+        Free buffers of other shapes are dropped, as the stream's frames have
+        changed size.
+        """
+        with self._lock:
+            for free_shape in list(self._free_buffers):
+                if free_shape != shape:
+                    del self._free_buffers[free_shape]
+
+            free_buffers = self._free_buffers.get(shape)
+            storage = free_buffers.pop() if free_buffers else None
+
+        if storage is None:
+            storage = np.empty(int(np.prod(shape)), dtype=np.uint8)
+
+        lease = _Lease(storage, shape)
+        frame = np.asarray(lease)
+
+        # Every view of the frame keeps the lease alive, so the storage is only
+        # reused once none of them are left
+        weakref.finalize(lease, self._release, shape, storage)
+
+        return frame
+
+    def clear(self) -> None:
+        """Free the buffers that are waiting to be reused"""
+        with self._lock:
+            self._free_buffers.clear()
+
+    def _release(self, shape: Tuple[int, ...], storage: np.ndarray) -> None:
+        with self._lock:
+            free_buffers = self._free_buffers.setdefault(shape, [])
+            if len(free_buffers) < self.MAX_FREE_BUFFERS:
+                free_buffers.append(storage)
+
+
+class _Lease:
+    """Exposes a pooled buffer as an array of a given shape.
+
+    Arrays made from a plain object (rather than from another array) keep that
+    object as their base, so this lease lives exactly as long as the arrays using
+    it do.
+    """
+
+    def __init__(self, storage: np.ndarray, shape: Tuple[int, ...]):
+        self._storage = storage
+        """Kept so that the memory stays allocated while the lease exists"""
+
+        self.__array_interface__ = {
+            "version": 3,
+            "shape": shape,
+            "typestr": storage.dtype.str,
+            "data": (storage.ctypes.data, False),
+        }
@@ -1,10 +1,11 @@
-from datetime import timedelta
-from typing import Dict, Optional
+import heapq
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
 from brainframe.api.bf_codecs import ZoneStatus, Zone
 
 from brainframe_qt.api_utils.detection_tracks import DetectionTrack
+from .buffer_sizer import BufferSizer
 from .frame_buffer import SyncedFrameBuffer
 from .zone_status_frame import ZoneStatusFrame
 
@@ -29,11 +30,23 @@ class FrameSyncer:
         self.buffer = SyncedFrameBuffer()
         """Holds a queue of empty ZoneStatusFrames"""
 
+        self.buffer_sizer = BufferSizer()
+        """Measures how deep the buffer needs to be to cover analysis latency"""
+
         self.tracks: Dict[UUID, DetectionTrack] = {}
         """Keep a dict of Detection.track_id: DetectionTrack of all detections
         that are ongoing. Then, every once in a while, prune DetectionTracks 
         that haven't gotten updates in a while."""
 
+        self._latest_tracks: Dict[UUID, DetectionTrack] = {}
+        """The DetectionTracks that had a detection in the latest ZoneStatus"""
+
+        self._track_expiry_heap: List[Tuple[float, UUID]] = []
+        """Min-heap with a (last seen timestamp, track ID) entry for each track in
+        self.tracks, so that pruning only needs to look at the oldest tracks. An
+        entry's timestamp may be older than the track's latest detection, in which
+        case the entry is pushed again with the new timestamp once it's popped."""
+
     def sync(self, *,
              latest_frame: ZoneStatusFrame,
              latest_zone_statuses: Dict[str, ZoneStatus]) \
@@ -47,6 +60,7 @@ class FrameSyncer:
         None if no frame to sync to."""
 
         self.buffer.add_frame(latest_frame)
+        self.buffer_sizer.record_frame(latest_frame.tstamp)
 
         # Analysis still spinning up. Skip
         if not len(latest_zone_statuses):
@@ -77,17 +91,10 @@ class FrameSyncer:
             # too far behind)
             self.buffer.pop_until(self.last_status_tstamp)
 
-            self.last_status_tstamp = status_tstamp
-
-            # Iterate over all new detections, and add them to their tracks
-            dets = latest_zone_statuses[Zone.FULL_FRAME_ZONE_NAME].within
-            for det in dets:
-                # Create new tracks where necessary
-                track_id = det.track_id if det.track_id else uuid4()
+            self.buffer_sizer.record_result(status_tstamp)
+            self.buffer.resize(self.buffer_sizer.target_length)
 
-                if det.track_id not in self.tracks:
-                    self.tracks[track_id] = DetectionTrack()
-                self.tracks[track_id].add_detection(det, status_tstamp)
+            self._add_to_tracks(latest_zone_statuses)
 
         # If we have a zone status/inference result newer than the latest
         # received frame, associate the buffer's oldest frame with the zone
@@ -95,8 +102,7 @@ class FrameSyncer:
         popped_frame = self.buffer.pop_if_older(self.last_status_tstamp)
         if popped_frame is not None:
             analysis_latency = status_tstamp - popped_frame.tstamp
-            analysis_latency = timedelta(seconds=analysis_latency)
-            popped_frame.frame_metadata.analysis_latency = analysis_latency
+            popped_frame.frame_metadata.analysis_latency_seconds = analysis_latency
 
         # Pop a frame if we're over the combined buffer max, but we also have
         # more frames than the guaranteed minimum
@@ -110,7 +116,7 @@ class FrameSyncer:
             self._apply_statuses_to_frame(
                 frame=popped_frame,
                 statuses=latest_zone_statuses,
-                tracks=self.tracks,
+                tracks=self._latest_tracks,
             )
 
             self.last_used_zone_statuses = latest_zone_statuses
@@ -121,25 +127,116 @@ class FrameSyncer:
         self.latest_processed = popped_frame
         return popped_frame
 
+    # noinspection PyMethodMayBeStatic
+    def pair_with_latest(self, *, frame: ZoneStatusFrame,
+                         latest_zone_statuses: Dict[str, ZoneStatus]) -> None:
+        """Pair a frame with the latest zone statuses without buffering it. Used
+        for frames that are displayed on their own, such as snapshots of paused
+        streams, where there is no later result to wait for
+
+        The frame is left without zone statuses if there are none yet.
+        """
+        if not len(latest_zone_statuses):
+            return
+
+        # Get timestamp off of default zone's status (all should be equal)
+        status_tstamp = latest_zone_statuses[Zone.FULL_FRAME_ZONE_NAME].tstamp
+
+        # Each detection gets a track of its own, as there is no history to
+        # interpolate with
+        tracks: Dict[UUID, DetectionTrack] = {}
+        dets = latest_zone_statuses[Zone.FULL_FRAME_ZONE_NAME].within
+        for det in dets:
+            track_id = det.track_id if det.track_id else uuid4()
+
+            tracks[track_id] = DetectionTrack()
+            tracks[track_id].add_detection(det, status_tstamp)
+
+        self._apply_statuses_to_frame(
+            frame=frame,
+            statuses=latest_zone_statuses,
+            tracks=tracks,
+        )
+
+    def pair_live(self, *, frame: ZoneStatusFrame,
+                  latest_zone_statuses: Dict[str, ZoneStatus]) -> None:
+        """Pair the newest frame with the latest zone statuses without waiting for
+        the results for that frame, for display in live mode. The frame is marked as
+        live, and its tracks are meant to be extrapolated up to the frame.
+
+        Can be used alongside sync(), or instead of it when nothing needs synced
+        frames, in which case frames don't need to be buffered at all.
+        """
+        frame.frame_metadata.live = True
+
+        if not len(latest_zone_statuses):
+            frame.frame_metadata.no_analysis = True
+            return
+
+        # Get timestamp off of default zone's status (all should be equal)
+        status_tstamp = latest_zone_statuses[Zone.FULL_FRAME_ZONE_NAME].tstamp
+
+        # Already done by sync() if it's being used too
+        if self.last_status_tstamp != status_tstamp:
+            self._add_to_tracks(latest_zone_statuses)
+
+        frame.frame_metadata.extrapolation_seconds = \
+            max(frame.tstamp - status_tstamp, 0)
+
+        self._apply_statuses_to_frame(
+            frame=frame,
+            statuses=latest_zone_statuses,
+            tracks=self._latest_tracks,
+        )
+
+        self._prune_detection_tracks(frame.tstamp)
+
+    def _add_to_tracks(self, zone_statuses: Dict[str, ZoneStatus]) -> None:
+        """Add the detections of new zone statuses to their tracks"""
+        # Get timestamp off of default zone's status (all should be equal)
+        status_tstamp = zone_statuses[Zone.FULL_FRAME_ZONE_NAME].tstamp
+        self.last_status_tstamp = status_tstamp
+
+        # Iterate over all new detections, and add them to their tracks
+        self._latest_tracks = {}
+        dets = zone_statuses[Zone.FULL_FRAME_ZONE_NAME].within
+        for det in dets:
+            # Create new tracks where necessary
+            track_id = det.track_id if det.track_id else uuid4()
+
+            if track_id not in self.tracks:
+                self.tracks[track_id] = DetectionTrack()
+                heapq.heappush(self._track_expiry_heap, (status_tstamp, track_id))
+            self.tracks[track_id].add_detection(det, status_tstamp)
+
+            self._latest_tracks[track_id] = self.tracks[track_id]
+
     # noinspection PyMethodMayBeStatic
     def _apply_statuses_to_frame(self, *, frame: ZoneStatusFrame,
                                  statuses: Dict[str, ZoneStatus],
                                  tracks: Dict[UUID, DetectionTrack]) \
             -> None:
-
-        # Get timestamp off of default zone's status (all should be equal)
-        status_tstamp = statuses[Zone.FULL_FRAME_ZONE_NAME].tstamp
-
-        # Get a list of DetectionTracks that had a detection for
-        # this timestamp
-        relevant_dets = [dt.copy() for dt in tracks.values()
-                         if dt.latest_tstamp == status_tstamp]
+        """
+        :param tracks: The DetectionTracks that had a detection in the statuses
+        """
+        # Snapshot the tracks, so that later detections don't affect this frame
+        relevant_dets = [dt.copy() for dt in tracks.values()]
 
         frame.zone_statuses = statuses
         frame.tracks = relevant_dets
 
     def _prune_detection_tracks(self, frame_tstamp: float) -> None:
-        for uuid, track in list(self.tracks.items()):
-            detection_lapse = frame_tstamp - track.latest_tstamp
-            if detection_lapse > self.MAX_CACHE_TRACK_SECONDS:
-                del self.tracks[uuid]
+        """Remove the tracks that haven't had a detection in the last
+        MAX_CACHE_TRACK_SECONDS. Only looks at tracks that are due to expire"""
+        expiry_tstamp = frame_tstamp - self.MAX_CACHE_TRACK_SECONDS
+
+        heap = self._track_expiry_heap
+        while heap and heap[0][0] < expiry_tstamp:
+            _, track_id = heapq.heappop(heap)
+
+            latest_tstamp = self.tracks[track_id].latest_tstamp
+            if latest_tstamp < expiry_tstamp:
+                del self.tracks[track_id]
+            else:
+                # The track has been seen since this entry was pushed
+                heapq.heappush(heap, (latest_tstamp, track_id))
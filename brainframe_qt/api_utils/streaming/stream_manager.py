@@ -1,21 +1,55 @@
 import logging
+import time
 import typing
 from threading import RLock
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 
-from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QObject, QTimer
 
 from brainframe.api.bf_codecs import StreamConfiguration
 
 from brainframe_qt.api_utils import api
+from brainframe_qt.ui.resources.config import StreamingSettings
+from .cpu_monitor import CpuMonitor
+from .frame_buffer import SyncedFrameBuffer
 from .synced_reader import SyncedStreamReader
 
+if TYPE_CHECKING:
+    from .decoder_pool import DecoderPool
+
 
 class StreamManager(QObject):
     """Keeps track of existing Stream objects, and creates new ones as necessary"""
 
-    _MAX_ACTIVE_STREAMS = 5
-    """Number of streams to run concurrently"""
+    _INITIAL_ACTIVE_STREAMS = 5
+    """Number of streams to run concurrently, before any CPU usage is measured"""
+    _MIN_ACTIVE_STREAMS = 1
+    _MAX_ACTIVE_STREAMS = 32
+    """Bounds on the number of streams to run concurrently"""
+
+    _NUM_WARM_STREAMS = 3
+    """Number of recently expanded streams that stay connected while paused, so that
+    switching back to them is instant"""
+
+    _SNAPSHOT_INTERVAL_MS = 500
+    """How often to check whether the next paused stream's snapshot can be taken"""
+    _SNAPSHOT_RETRY_DELAY = 60
+    """Seconds to skip a paused stream for after its snapshot timed out, so that
+    unreachable streams don't hold up the snapshots of the others"""
+
+    _CLOSE_TIMEOUT = 10
+    """Seconds to wait for all streams to close when closing the StreamManager.
+    Streams still closing after that are left behind. Their threads are daemons, so
+    they don't keep the client from exiting"""
+
+    _CPU_SAMPLE_INTERVAL_MS = 5000
+    """How often CPU usage is measured to adjust the number of active streams"""
+    _CPU_HIGH_USAGE = 0.75
+    """CPU usage (fraction of the usable capacity, see CpuMonitor) above which a
+    stream is paused"""
+    _CPU_LOW_USAGE = 0.5
+    """CPU usage (fraction of the usable capacity) below which another stream may
+    run"""
 
     def __init__(self, *, parent: QObject):
         super().__init__(parent=parent)
@@ -25,10 +59,43 @@ class StreamManager(QObject):
         self._running_streams: List[int] = []
         """Currently running streams. Does not include stay-alive streams.
         
-        Max length should be _NUM_ACTIVE_STREAMS
+        Most recently started or resumed first. Max length should be 
+        _max_active_streams
         """
         self._paused_streams: List[int] = []
-        """Currently paused streams"""
+        """Currently paused streams. Most recently paused first"""
+
+        self._max_active_streams = self._INITIAL_ACTIVE_STREAMS
+        """Number of streams to run concurrently. Adjusted to the CPU headroom"""
+
+        self._hidden_streams: Set[int] = set()
+        """Streams that are not visible anywhere on screen. Streams without any
+        visibility information are assumed to be visible"""
+        self._alerting_streams: Set[int] = set()
+        """Streams with ongoing alerts"""
+        self._expanded_streams: Set[int] = set()
+        """Streams open in the expanded view"""
+        self._warm_streams: List[int] = []
+        """Most recently expanded streams, most recent first. These are kept
+        connected when paused. Max length should be _NUM_WARM_STREAMS"""
+
+        self._snapshot_stream_id: Optional[int] = None
+        """Paused stream that was most recently asked for a snapshot"""
+        self._snapshot_retry_times: Dict[int, float] = {}
+        """When streams whose snapshot timed out may be snapshotted again, as
+        time.monotonic() values"""
+
+        self._cpu_monitor = CpuMonitor()
+        self._cpu_timer = QTimer(self)
+        self._snapshot_timer = QTimer(self)
+
+        self.streaming_settings = StreamingSettings()
+
+        self._decoder_pool: Optional["DecoderPool"] = None
+        """Worker processes that streams are decoded in. Only used if enabled in the
+        settings when the StreamManager is created"""
+        if self.streaming_settings.multiprocess_decoding:
+            self._decoder_pool = self._create_decoder_pool()
 
         self.stream_readers: Dict[int, SyncedStreamReader] = {}
         """All StreamReaders currently instantiated, paused or unpaused"""
@@ -38,6 +105,12 @@ class StreamManager(QObject):
     def _init_signals(self) -> None:
         self.destroyed.connect(self.close)
 
+        self._cpu_timer.timeout.connect(self._adjust_max_active_streams)
+        self._cpu_timer.start(self._CPU_SAMPLE_INTERVAL_MS)
+
+        self._snapshot_timer.timeout.connect(self._take_next_snapshot)
+        self._snapshot_timer.start(self._SNAPSHOT_INTERVAL_MS)
+
     def close(self) -> None:
         """Request and wait for all streams to close"""
         logging.info("Initiating StreamManager close")
@@ -59,19 +132,74 @@ class StreamManager(QObject):
         self._set_stream_paused(stream_id, False)
         self._ensure_running_streams()
 
+    def set_stream_visible(self, stream_id: int, visible: bool) -> None:
+        """Report whether a stream can currently be seen by the user. Streams that
+        can't be seen are paused unless they are expanded or alerting."""
+        with self._stream_lock:
+            if visible == (stream_id not in self._hidden_streams):
+                return
+
+            if visible:
+                self._hidden_streams.discard(stream_id)
+            else:
+                self._hidden_streams.add(stream_id)
+
+            self._ensure_running_streams()
+
+    def set_stream_alerting(self, stream_id: int, alerting: bool) -> None:
+        """Report whether a stream has ongoing alerts. Alerting streams are run
+        before other streams"""
+        with self._stream_lock:
+            if alerting == (stream_id in self._alerting_streams):
+                return
+
+            if alerting:
+                self._alerting_streams.add(stream_id)
+            else:
+                self._alerting_streams.discard(stream_id)
+
+            self._ensure_running_streams()
+
+    def set_stream_expanded(self, stream_id: int, expanded: bool) -> None:
+        """Report whether a stream is open in the expanded view. Expanded streams
+        are run before any others"""
+        with self._stream_lock:
+            if expanded == (stream_id in self._expanded_streams):
+                return
+
+            if expanded:
+                self._expanded_streams.add(stream_id)
+                self._mark_stream_warm(stream_id)
+            else:
+                self._expanded_streams.discard(stream_id)
+
+            self._ensure_running_streams()
+
     def start_streaming(
             self,
             stream_conf: StreamConfiguration,
             url: str,
+            *,
+            consumer: Optional[object] = None,
+            display_size: Optional[Tuple[int, int]] = None,
     ) -> SyncedStreamReader:
         """Starts reading from the stream using the given information, or returns an
         existing reader if we're already reading this stream.
 
         :param stream_conf: The stream to connect to
         :param url: The URL to stream on
+        :param consumer: The object that will display the stream's frames
+        :param display_size: The (width, height) the consumer displays frames at.
+            Frames are downscaled to the size of the largest consumer. Further changes
+            can be made using SyncedStreamReader.set_display_size
         :return: A SyncedStreamReader for the stream
         """
-        return self._start_stream(stream_conf, url)
+        stream_reader = self._start_stream(stream_conf, url)
+
+        if consumer is not None:
+            stream_reader.set_display_size(consumer, display_size)
+
+        return stream_reader
 
     def stop_streaming(self, stream_id: int) -> None:
         """Requests a stream to close asynchronously
@@ -82,11 +210,41 @@ class StreamManager(QObject):
         self._ensure_running_streams()
 
     def _close(self) -> None:
+        # Ask every stream to close before waiting on any of them, so that they
+        # all tear down at the same time
         with self._stream_lock:
             streams = self.stream_readers.copy()
-            for stream_id, stream_reader in streams.items():
+            for stream_id in streams:
                 self._stop_stream(stream_id)
-                stream_reader.wait_until_closed()
+
+        deadline = time.monotonic() + self._CLOSE_TIMEOUT
+        unclosed_streams: List[int] = []
+        for stream_id, stream_reader in streams.items():
+            timeout = max(deadline - time.monotonic(), 0)
+            if not stream_reader.wait_until_closed(timeout=timeout):
+                unclosed_streams.append(stream_id)
+
+        if unclosed_streams:
+            logging.warning(f"Streams {unclosed_streams} did not close within "
+                            f"{self._CLOSE_TIMEOUT} seconds. Leaving them behind")
+
+        if self._decoder_pool is not None:
+            self._decoder_pool.close()
+
+    def _create_decoder_pool(self) -> Optional["DecoderPool"]:
+        """Start a pool for multi-process decoding, if this Python supports it"""
+        try:
+            # Imported here, as it needs multiprocessing.shared_memory (Python 3.8+)
+            from .decoder_pool import DecoderPool
+        except ImportError:
+            logging.warning("Multi-process decoding needs Python 3.8 or newer. "
+                            "Decoding streams in this process instead")
+            return None
+
+        return DecoderPool(
+            max_buffer_mb=self.streaming_settings.frame_buffer_mb,
+            min_buffered_frames=SyncedFrameBuffer.GUARANTEED_BUFFER_SPACE,
+        )
 
     def _create_synced_reader(
             self, stream_conf: StreamConfiguration, url: str
@@ -95,31 +253,165 @@ class StreamManager(QObject):
         synced_stream_reader = SyncedStreamReader(
             stream_conf,
             url,
+            decoder_pool=self._decoder_pool,
             # No parent if moving to a different thread
             parent=typing.cast(QObject, None),
         )
 
         return synced_stream_reader
 
+    def _adjust_max_active_streams(self) -> None:
+        """Run fewer streams if the CPU is close to saturated, or more if there is
+        headroom and streams are waiting to run"""
+        cpu_usage = self._cpu_monitor.sample()
+
+        with self._stream_lock:
+            max_active_streams = self.next_max_active_streams(
+                self._max_active_streams, cpu_usage,
+                num_wanted_streams=len(self._wanted_streams()),
+            )
+            if max_active_streams == self._max_active_streams:
+                return
+
+            self._max_active_streams = max_active_streams
+
+            logging.debug(f"CPU usage at {cpu_usage:.0%}. Running up to "
+                          f"{self._max_active_streams} streams")
+
+            self._ensure_running_streams()
+
+    @classmethod
+    def next_max_active_streams(cls, max_active_streams: int, cpu_usage: float,
+                                *, num_wanted_streams: int) -> int:
+        """The number of streams to run concurrently after a CPU usage sample.
+
+        :param max_active_streams: The current number of streams to run
+        :param cpu_usage: The usage reported by CpuMonitor.sample
+        :param num_wanted_streams: Number of streams that would run if there was
+            capacity for all of them
+        """
+        if cpu_usage > cls._CPU_HIGH_USAGE:
+            return max(max_active_streams - 1, cls._MIN_ACTIVE_STREAMS)
+        if cpu_usage < cls._CPU_LOW_USAGE and num_wanted_streams > max_active_streams:
+            return min(max_active_streams + 1, cls._MAX_ACTIVE_STREAMS)
+        return max_active_streams
+
+    def _take_next_snapshot(self) -> None:
+        """Take a snapshot of the next visible paused stream, one stream at a time,
+        so that their thumbnails stay fresh for the cost of a single extra decoder"""
+        if not self.streaming_settings.snapshot_paused_streams:
+            return
+
+        with self._stream_lock:
+            previous_stream_id = self._snapshot_stream_id
+            if previous_stream_id in self.stream_readers:
+                previous_reader = self.stream_readers[previous_stream_id]
+                if previous_reader.is_taking_snapshot:
+                    return
+                if previous_reader.snapshot_timed_out:
+                    self._snapshot_retry_times[previous_stream_id] = \
+                        time.monotonic() + self._SNAPSHOT_RETRY_DELAY
+
+            now = time.monotonic()
+
+            # Warm streams are still connected, and don't need a snapshot
+            candidates = sorted(
+                stream_id for stream_id in self._paused_streams
+                if stream_id not in self._hidden_streams
+                and stream_id not in self._warm_streams
+                and self._snapshot_retry_times.get(stream_id, now) <= now
+            )
+            if not candidates:
+                self._snapshot_stream_id = None
+                return
+
+            # Round-robin by stream ID, so that streams being paused and resumed
+            # doesn't change the order
+            if previous_stream_id is None:
+                next_stream_id = candidates[0]
+            else:
+                next_stream_id = next(
+                    (stream_id for stream_id in candidates
+                     if stream_id > previous_stream_id),
+                    candidates[0]
+                )
+
+            self._snapshot_stream_id = next_stream_id
+            self.stream_readers[next_stream_id].take_snapshot()
+
     def _ensure_running_streams(self) -> None:
-        """Pause/unpause streams if over/under max"""
+        """Run the highest priority streams that are wanted, up to the maximum, and
+        pause the rest"""
         with self._stream_lock:
-            while (
-                len(self._running_streams) < self._MAX_ACTIVE_STREAMS
-                and self._paused_streams
-            ):
-                self._set_stream_paused(self._paused_streams[0], False)
+            streams_to_run = self._wanted_streams()[:self._max_active_streams]
+
+            for running_stream_id in self._running_streams.copy():
+                if running_stream_id not in streams_to_run:
+                    self._set_stream_paused(running_stream_id, paused=True)
 
-            for _running_stream_id in self._running_streams[self._MAX_ACTIVE_STREAMS:]:
-                self._set_stream_paused(_running_stream_id, paused=True)
+            # Resume in reverse so the highest priority stream ends up first
+            for stream_id in reversed(streams_to_run):
+                if stream_id not in self._running_streams:
+                    self._set_stream_paused(stream_id, paused=False)
+
+    def _mark_stream_warm(self, stream_id: int) -> None:
+        """Keep a stream connected while paused, disconnecting the least recently
+        marked stream if there are too many"""
+        with self._stream_lock:
+            if stream_id in self._warm_streams:
+                self._warm_streams.remove(stream_id)
+            self._warm_streams.insert(0, stream_id)
+
+            for cold_stream_id in self._warm_streams[self._NUM_WARM_STREAMS:]:
+                self._warm_streams.remove(cold_stream_id)
+
+                # Disconnect it if it's being kept warm
+                if cold_stream_id in self._paused_streams:
+                    self.stream_readers[cold_stream_id].pause_streaming()
+
+    def _wanted_streams(self) -> List[int]:
+        """Streams that should be running if there is capacity, highest priority
+        first.
+
+        Expanded streams come first, then alerting streams, then the rest. Streams
+        that can't be seen are only wanted if they are expanded or alerting. Ties
+        are broken in favor of streams that are already running, and then by
+        recency.
+        """
+        with self._stream_lock:
+            candidates = self._running_streams + self._paused_streams
+
+            wanted_streams = [
+                stream_id for stream_id in candidates
+                if stream_id not in self._hidden_streams
+                or stream_id in self._expanded_streams
+                or stream_id in self._alerting_streams
+            ]
+
+            # Sort is stable, so ties keep their running/recency order
+            wanted_streams.sort(
+                key=lambda stream_id: (stream_id in self._expanded_streams,
+                                       stream_id in self._alerting_streams),
+                reverse=True,
+            )
+
+        return wanted_streams
 
     def _forget_stream(self, stream_id: int) -> None:
         with self._stream_lock:
+            if stream_id in self._warm_streams:
+                self._warm_streams.remove(stream_id)
+
             self._set_stream_paused(stream_id, paused=True)
 
             self._paused_streams.remove(stream_id)
             self.stream_readers.pop(stream_id)
 
+            self._hidden_streams.discard(stream_id)
+            self._alerting_streams.discard(stream_id)
+            self._expanded_streams.discard(stream_id)
+            self._snapshot_retry_times.pop(stream_id, None)
+
     def _get_stream_reader(
         self,
         stream_conf: StreamConfiguration,
@@ -140,7 +432,8 @@ class StreamManager(QObject):
             stream_reader = self.stream_readers[stream_id]
 
             if paused:
-                stream_reader.pause_streaming()
+                keep_warm = stream_id in self._warm_streams
+                stream_reader.pause_streaming(keep_warm=keep_warm)
                 destination_list = self._paused_streams
             else:
                 stream_reader.resume_streaming()
@@ -1,20 +1,28 @@
 import logging
+import math
 from enum import Enum, auto
-from threading import Event, Thread
-from typing import Optional
+from threading import Thread
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
 
+import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from brainframe.api.bf_codecs import StreamConfiguration
+from brainframe.api.bf_codecs import StreamConfiguration, ZoneStatus
 from gstly import gobject_init
 from gstly.stream_reader import GstStreamReader, StreamReader, StreamStatus
 
 from brainframe_qt.api_utils import api
-from brainframe_qt.util.events import or_events
+from brainframe_qt.util.events import EventMultiplexer, EventWatcher, \
+    NotifyingEvent
 
+from .frame_pool import FramePool
 from .frame_syncer import FrameSyncer
 from .zone_status_frame import ZoneStatusFrame
 
+if TYPE_CHECKING:
+    # Only importable on Python 3.8+, and only used if enabled
+    from .decoder_pool import DecoderPool, ProcessStreamReader
+
 
 class SyncedStatus(Enum):
     """SyncedStreamReader wrapper of gstly's StreamStatus.
@@ -48,6 +56,7 @@ class SyncedStreamReader(QObject):
     """Reads frames from a stream and syncs them up with zone statuses."""
 
     frame_received = pyqtSignal()
+    live_frame_received = pyqtSignal()
     stream_state_changed = pyqtSignal(SyncedStatus)
 
     finished = pyqtSignal()
@@ -58,42 +67,89 @@ class SyncedStreamReader(QObject):
     ]
     """Video types that are re-hosted by the server"""
 
+    SNAPSHOT_TIMEOUT = 3
+    """Seconds to wait for a frame when taking a snapshot of a paused stream. Kept
+    short, as paused streams are snapshotted one at a time"""
+
     def __init__(
         self,
         stream_conf: StreamConfiguration,
         stream_url: str,
         *,
+        decoder_pool: Optional["DecoderPool"] = None,
         parent: QObject
     ):
         """Creates a new SyncedStreamReader.
 
         :param stream_conf: The stream that this synced stream reader is for
         :param stream_url: The url of the stream
+        :param decoder_pool: If provided, the stream is decoded in one of the pool's
+            worker processes instead of in this process
         """
         super().__init__(parent=parent)
 
         self.stream_conf = stream_conf
         self.stream_url = stream_url
 
-        self._stream_reader: Optional[GstStreamReader] = None
+        self._decoder_pool = decoder_pool
+
+        self._stream_reader: Optional[
+            Union[GstStreamReader, "ProcessStreamReader"]
+        ] = None
 
         self.latest_processed_frame: Optional[ZoneStatusFrame] = None
         """Latest frame synced with results. None if no frames have been synced yet"""
+        self.latest_live_frame: Optional[ZoneStatusFrame] = None
+        """Latest frame handed out without waiting for its results. Only kept up to
+        date while a consumer is in live mode"""
 
         self.frame_syncer = FrameSyncer()
 
         self._stream_status = SyncedStatus.INITIALIZING
 
-        self._start_streaming_event = Event()
+        self._display_sizes: Dict[int, Tuple[int, int]] = {}
+        """The (width, height) each consumer displays frames at, keyed by the id()
+        of the consumer"""
+        self._display_sizes_snapshot: Tuple[Tuple[int, int], ...] = ()
+        """Copy of the display sizes that the reader thread can read safely"""
+
+        self._live_modes: Dict[int, bool] = {}
+        """Whether each consumer displays frames in live mode, keyed by the id() of
+        the consumer"""
+        self._live_frames_wanted = False
+        self._synced_frames_wanted = True
+        """Whether any consumer wants live or synced frames. Consumers that have not
+        set a mode are not taken into account, and synced frames are made if there
+        are none"""
+
+        self._frame_pool = FramePool()
+        """Buffers that downscaled frames are written into"""
+
+        self._start_streaming_event = NotifyingEvent()
         """Used to request the thread to start streaming"""
-        self._pause_streaming_event = Event()
+        self._pause_streaming_event = NotifyingEvent()
         """Used to request the thread to (temporarily) pause streaming"""
+        self._keep_warm = False
+        """Whether the GstStreamReader stays connected while streaming is paused"""
+        self._snapshot_event = NotifyingEvent()
+        """Used to request the thread to grab a single frame while paused. Cleared
+        once the snapshot has been taken (or has failed)"""
+        self._snapshot_timed_out = False
+        """Whether no frame arrived in time for the most recent snapshot"""
 
         self._start_streaming_event.set()
 
-        self._interrupt_requested = False
+        self._interrupt_event = NotifyingEvent()
         """Used to signal thread to stop"""
 
+        self._frame_event = NotifyingEvent()
+        """Set when the GstStreamReader has a new frame"""
+        self._status_event = NotifyingEvent()
+        """Set when the GstStreamReader's status changes"""
+        self._event_watchers: List[EventWatcher] = []
+        """Mirror the GstStreamReader's own events onto _frame_event and
+        _status_event, as the reader's events can't be waited on together"""
+
         # Start thread, now that the object is all set up
         self._thread = self._init_thread()
 
@@ -116,6 +172,16 @@ class SyncedStreamReader(QObject):
             or self.stream_status is SyncedStatus.PAUSED
         )
 
+    @property
+    def is_taking_snapshot(self) -> bool:
+        """Whether a snapshot has been requested and has not finished yet"""
+        return self._snapshot_event.is_set()
+
+    @property
+    def snapshot_timed_out(self) -> bool:
+        """Whether the most recent snapshot gave up waiting for a frame"""
+        return self._snapshot_timed_out
+
     @property
     def stream_status(self) -> SyncedStatus:
         """The current status of the stream"""
@@ -131,20 +197,81 @@ class SyncedStreamReader(QObject):
             self._stream_status = stream_status
             self.stream_state_changed.emit(stream_status)
 
+    def set_display_size(
+        self, consumer: object, display_size: Optional[Tuple[int, int]]
+    ) -> None:
+        """Set the size, in pixels, that a consumer displays this stream's frames at.
+
+        Frames are downscaled in the reader thread when every consumer displays them
+        smaller than the stream's resolution. Consumers that have not set a size are
+        not taken into account.
+
+        :param consumer: The object displaying the frames
+        :param display_size: (width, height) of the display area, or None to remove
+            the consumer's request
+        """
+        if display_size is None:
+            self._display_sizes.pop(id(consumer), None)
+        else:
+            self._display_sizes[id(consumer)] = display_size
+
+        self._display_sizes_snapshot = tuple(self._display_sizes.values())
+
+    def set_live_mode(self, consumer: object, live_mode: Optional[bool]) -> None:
+        """Set whether a consumer displays this stream in live mode.
+
+        In live mode, the newest decoded frame is handed out right away through
+        latest_live_frame and the live_frame_received signal, instead of waiting for
+        the results for that frame. Frames are only buffered for syncing while a
+        consumer isn't in live mode.
+
+        :param consumer: The object displaying the frames
+        :param live_mode: Whether the consumer is in live mode, or None to remove
+            the consumer's request
+        """
+        if live_mode is None:
+            self._live_modes.pop(id(consumer), None)
+        else:
+            self._live_modes[id(consumer)] = live_mode
+
+        live_modes = self._live_modes.values()
+        self._live_frames_wanted = any(live_modes)
+        self._synced_frames_wanted = not live_modes or not all(live_modes)
+
     def close(self) -> None:
         """Sends a request to close the SyncedStreamReader"""
         logging.debug(f"SyncedStreamReader for stream {self.stream_conf.id} closing")
 
-        self._interrupt_requested = True
+        self._interrupt_event.set()
 
-    def pause_streaming(self) -> None:
+    def pause_streaming(self, *, keep_warm: bool = False) -> None:
         """Pause streaming.
 
         Streaming is not immediately paused, but will be handled in the main loop in
         _process_stream_events
+
+        :param keep_warm: Keep the stream connected while paused. Its frames are
+            discarded instead of being synced, but streaming can be resumed without
+            rebuilding the pipeline. Pausing a warm stream again with keep_warm=False
+            disconnects it
         """
+        self._keep_warm = keep_warm
         self._pause_streaming_event.set()
 
+    def take_snapshot(self) -> None:
+        """Briefly connect to a paused stream to sync a single frame with the latest
+        results, then disconnect again. The status of the stream stays PAUSED.
+
+        Does nothing unless the stream is paused and disconnected.
+        """
+        if self.stream_status is not SyncedStatus.PAUSED:
+            return
+        if self._stream_reader is not None:
+            # Paused, but kept warm
+            return
+
+        self._snapshot_event.set()
+
     def resume_streaming(self) -> None:
         """Resume (more accurately, re-start) streaming.
 
@@ -163,23 +290,43 @@ class SyncedStreamReader(QObject):
 
     def run(self) -> None:
         """Main loop for the created thread"""
-        while not self._interrupt_requested:
-            if self._start_streaming_event.wait(0.2):
-                self._start_streaming()
-                self._process_stream_events()
+        requests = EventMultiplexer(self._start_streaming_event,
+                                    self._pause_streaming_event,
+                                    self._snapshot_event,
+                                    self._interrupt_event)
+
+        with requests:
+            while not self._interrupt_event.is_set():
+                requests.wait()
+
+                if self._interrupt_event.is_set():
+                    break
+
+                if self._start_streaming_event.is_set():
+                    self._start_streaming()
+                    self._process_stream_events()
+                    continue
+
+                # Already paused, so there's nothing left to pause
+                self._pause_streaming_event.clear()
+
+                if self._snapshot_event.is_set():
+                    self._take_snapshot()
 
         if self._stream_reader is not None:
             self._stop_streaming()
 
         self._finish()
 
-    def wait_until_closed(self) -> None:
-        """Hangs until the SyncedStreamReader has been closed. Must be called from
-        another QThread"""
-        if self._stream_reader is not None:
-            self._stream_reader.wait_until_closed()
+    def wait_until_closed(self, timeout: Optional[float] = None) -> bool:
+        """Hangs until the SyncedStreamReader has been closed, which includes
+        closing its GstStreamReader. Must be called from another thread
 
-        self.thread().wait()
+        :param timeout: Seconds to wait for, or None to wait indefinitely
+        :return: False if the timeout was reached first
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
 
     def _finish(self) -> None:
         """Final clean-up for the SyncedStreamReader.
@@ -193,25 +340,43 @@ class SyncedStreamReader(QObject):
         self.finished.emit()
 
     def _handle_frame_event(self) -> None:
-        self._stream_reader.new_frame_event.clear()
+        self._frame_event.clear()
 
-        # Get the new frame + timestamp
-        frame_tstamp, frame_bgr = self._stream_reader.latest_frame
-        frame_rgb = frame_bgr[..., ::-1].copy()
-        del frame_bgr
+        latest_frame = self._latest_frame()
 
         # Get the latest zone statuses from status receiver thread
         statuses = api.get_status_receiver().latest_statuses(self.stream_conf.id)
 
-        # Convert the numpy frame to a QPixmap
-        frame = ZoneStatusFrame.pixmap_from_numpy_frame(frame_rgb)
+        # Live frames are separate objects, as syncing modifies buffered frames
+        live_frame = None
+        if self._live_frames_wanted:
+            live_frame = ZoneStatusFrame(
+                frame=latest_frame.frame,
+                tstamp=latest_frame.tstamp,
+                downscale_factor=latest_frame.downscale_factor,
+            )
+
+        if self._synced_frames_wanted:
+            self._sync_frame(latest_frame, statuses)
+        elif not self.frame_syncer.buffer.is_empty:
+            # Nobody needs synced frames anymore
+            self.frame_syncer.buffer.pop_until(math.inf)
+
+        # Synced frames first, so that new results are added to the tracks by sync()
+        if live_frame is not None:
+            self.frame_syncer.pair_live(frame=live_frame,
+                                        latest_zone_statuses=statuses)
+
+            self.latest_live_frame = live_frame
+            self.live_frame_received.emit()
 
+    def _sync_frame(self, latest_frame: ZoneStatusFrame,
+                    statuses: Dict[str, ZoneStatus]) -> None:
+        """Buffer the frame, and publish a frame if one has been synced with its
+        results"""
         # Run the syncing algorithm
         new_processed_frame = self.frame_syncer.sync(
-            latest_frame=ZoneStatusFrame(
-                frame=frame,
-                tstamp=frame_tstamp,
-            ),
+            latest_frame=latest_frame,
             latest_zone_statuses=statuses
         )
 
@@ -231,8 +396,53 @@ class SyncedStreamReader(QObject):
             if is_new:
                 self.frame_received.emit()
 
+    def _latest_frame(self) -> Optional[ZoneStatusFrame]:
+        """Wrap the GstStreamReader's newest frame in a ZoneStatusFrame. None if it
+        hasn't decoded any frames yet"""
+        latest_frame = self._stream_reader.latest_frame
+        if latest_frame is None:
+            return None
+
+        # Get the new frame + timestamp. The BGR frame is used as-is; it is only
+        # copied once, when a StreamWidget uploads it for display in the GUI thread
+        frame_tstamp, frame_bgr = latest_frame
+
+        # Shrink the frame if nobody displays it at full resolution. The decimated
+        # copy replaces the full frame for the rest of the frame's life, and its
+        # buffer is reused once the frame is gone
+        downscale_factor = self._downscale_factor(frame_bgr)
+        if downscale_factor > 1:
+            decimated = frame_bgr[::downscale_factor, ::downscale_factor]
+            frame_bgr = self._frame_pool.empty(decimated.shape)
+            np.copyto(frame_bgr, decimated)
+
+        return ZoneStatusFrame(
+            frame=frame_bgr,
+            tstamp=frame_tstamp,
+            downscale_factor=downscale_factor,
+        )
+
+    def _downscale_factor(self, frame: np.ndarray) -> int:
+        """The largest integer factor that the frame can be shrunk by while still
+        being at least as large as the largest consumer displays it"""
+        display_sizes = self._display_sizes_snapshot
+        if not display_sizes:
+            return 1
+
+        frame_height, frame_width = frame.shape[:2]
+
+        # Frames are scaled to fit the display area, keeping their aspect ratio
+        display_scale = max(
+            min(width / frame_width, height / frame_height)
+            for width, height in display_sizes
+        )
+        if display_scale <= 0:
+            return 1
+
+        return max(int(1 / display_scale), 1)
+
     def _handle_status_event(self) -> None:
-        self._stream_reader.new_status_event.clear()
+        self._status_event.clear()
 
         self.stream_status = SyncedStatus.from_stream_status(self._stream_reader.status)
 
@@ -240,6 +450,26 @@ class SyncedStreamReader(QObject):
         """Create a new GstStreamReader. Gstreamer streaming begins immediately"""
         self._start_streaming_event.clear()
 
+        self._open_stream_reader()
+
+        # Ensure that the status is sent out (esp. if we're resuming a stream)
+        self.stream_status = SyncedStatus.INITIALIZING
+
+    def _open_stream_reader(self) -> None:
+        """Create a GstStreamReader, and start watching its events"""
+        self._stream_reader = self._create_gst_stream_reader()
+
+        stream_id = self.stream_conf.id
+        self._event_watchers = [
+            EventWatcher(self._stream_reader.new_frame_event, self._frame_event.set,
+                         name=f"Frame watcher for stream ID {stream_id}"),
+            EventWatcher(self._stream_reader.new_status_event,
+                         self._status_event.set,
+                         name=f"Status watcher for stream ID {stream_id}"),
+        ]
+
+    def _create_gst_stream_reader(self) \
+            -> Union[GstStreamReader, "ProcessStreamReader"]:
         pipeline: Optional[str] = self.stream_conf.connection_options.get("pipeline")
 
         latency = StreamReader.DEFAULT_LATENCY
@@ -249,9 +479,7 @@ class SyncedStreamReader(QObject):
         # Streams created with a premises are always proxied from that premises
         is_proxied = self.stream_conf.premises_id is not None
 
-        gobject_init.start()
-
-        self._stream_reader = GstStreamReader(
+        stream_reader_kwargs = dict(
             url=self.stream_url,
             latency=latency,
             runtime_options=self.stream_conf.runtime_options,
@@ -259,8 +487,12 @@ class SyncedStreamReader(QObject):
             proxied=is_proxied
         )
 
-        # Ensure that the status is sent out (esp. if we're resuming a stream)
-        self.stream_status = SyncedStatus.INITIALIZING
+        if self._decoder_pool is not None:
+            return self._decoder_pool.open_stream(**stream_reader_kwargs)
+
+        gobject_init.start()
+
+        return GstStreamReader(**stream_reader_kwargs)
 
     def _stop_streaming(self) -> None:
         """Stop the current stream. Blocking function.
@@ -268,9 +500,20 @@ class SyncedStreamReader(QObject):
         Tells the GstStreamReader to close and wait for the thread to join. Then
         discards the reference to the GstStreamReader
         """
+        for event_watcher in self._event_watchers:
+            event_watcher.close()
+        self._event_watchers = []
+
         self._stream_reader.wait_until_closed()
         self._stream_reader = None
 
+        # Nothing is pending for the next GstStreamReader
+        self._frame_event.clear()
+        self._status_event.clear()
+
+        # Frames that are still buffered or displayed keep their own buffers
+        self._frame_pool.clear()
+
     def _process_stream_events(self) -> None:
         """Handle posted events in current object and within the GstStreamReader"""
         if self._stream_reader is None:
@@ -280,24 +523,111 @@ class SyncedStreamReader(QObject):
             )
             return
 
-        frame_or_status_event = or_events(self._stream_reader.new_frame_event,
-                                          self._stream_reader.new_status_event)
+        stream_events = EventMultiplexer(self._frame_event,
+                                         self._status_event,
+                                         self._pause_streaming_event,
+                                         self._interrupt_event)
 
-        while not self._interrupt_requested:
+        with stream_events:
+            while not self._interrupt_event.is_set():
 
-            if self._pause_streaming_event.is_set():
-                # Streaming paused. Stop loop for now
-                self.stream_status = SyncedStatus.PAUSED
-                self._pause_streaming_event.clear()
-                break
+                if self._pause_streaming_event.is_set():
+                    # Streaming paused. Stop loop for now
+                    self.stream_status = SyncedStatus.PAUSED
+                    self._pause_streaming_event.clear()
 
-            if not frame_or_status_event.wait(0.2):
-                continue
+                    if self._keep_warm and self._idle_warm():
+                        # Resumed without having to reconnect
+                        continue
 
-            if self._stream_reader.new_status_event.is_set():
-                self._handle_status_event()
-            if self._stream_reader.new_frame_event.is_set():
-                self._handle_frame_event()
+                    break
+
+                stream_events.wait()
+
+                if self._status_event.is_set():
+                    self._handle_status_event()
+                if self._frame_event.is_set():
+                    self._handle_frame_event()
 
         if self._stream_reader is not None:
             self._stop_streaming()
+
+    def _idle_warm(self) -> bool:
+        """Keep the GstStreamReader connected while paused, ignoring its frames until
+        streaming is resumed.
+
+        :return: True if streaming was resumed, False if the GstStreamReader should be
+            torn down
+        """
+        # Buffered frames would be stale by the time streaming is resumed
+        self.frame_syncer.buffer.pop_until(math.inf)
+
+        requests = EventMultiplexer(self._start_streaming_event,
+                                    self._pause_streaming_event,
+                                    self._interrupt_event)
+
+        with requests:
+            while not self._interrupt_event.is_set():
+
+                if self._start_streaming_event.is_set():
+                    if self._stream_reader.status is not StreamStatus.STREAMING:
+                        # The connection was lost while paused. Leave the start
+                        # request set so that the stream is rebuilt
+                        return False
+
+                    self._start_streaming_event.clear()
+                    self.stream_status = SyncedStatus.STREAMING
+
+                    self._publish_latest_frame()
+                    return True
+
+                if self._pause_streaming_event.is_set():
+                    # Already paused, but may have been asked to disconnect
+                    self._pause_streaming_event.clear()
+                    if not self._keep_warm:
+                        return False
+
+                # Frame and status events are left pending, and are picked up once
+                # streaming is resumed
+                requests.wait()
+
+        return False
+
+    def _publish_latest_frame(self) -> None:
+        """Hand out the newest decoded frame straight away, paired with the latest
+        results instead of waiting for the results for that frame. Used when there
+        is no time to wait, such as for snapshots or when resuming a warm stream"""
+        latest_frame = self._latest_frame()
+        if latest_frame is None:
+            return
+
+        statuses = api.get_status_receiver().latest_statuses(self.stream_conf.id)
+        self.frame_syncer.pair_with_latest(frame=latest_frame,
+                                          latest_zone_statuses=statuses)
+
+        # Consumers in either mode get the frame
+        self.latest_processed_frame = latest_frame
+        self.latest_live_frame = latest_frame
+        self.frame_received.emit()
+        self.live_frame_received.emit()
+
+    def _take_snapshot(self) -> None:
+        """Connect to the stream just long enough to publish one frame, then
+        disconnect. The stream status is left as-is"""
+        self._open_stream_reader()
+
+        frame_or_request = EventMultiplexer(self._frame_event,
+                                            self._start_streaming_event,
+                                            self._interrupt_event)
+
+        with frame_or_request:
+            self._snapshot_timed_out = not frame_or_request.wait(
+                self.SNAPSHOT_TIMEOUT)
+
+        # Streaming may have been resumed or the reader closed in the meantime
+        if self._frame_event.is_set():
+            self._frame_event.clear()
+            self._publish_latest_frame()
+
+        self._stop_streaming()
+        self._snapshot_event.clear()
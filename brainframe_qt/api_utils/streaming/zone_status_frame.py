@@ -1,64 +1,192 @@
-from dataclasses import dataclass, field
 from datetime import timedelta
 from typing import Dict, List, Optional
 
 import numpy as np
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
 from PyQt5.QtGui import QImage, QPixmap
 
 from brainframe.api.bf_codecs import ZoneStatus
 
 from brainframe_qt.api_utils.detection_tracks import DetectionTrack
 
+# QImage.Format_BGR888 was added in Qt 5.14
+_QIMAGE_FORMAT_BGR888 = getattr(QImage, "Format_BGR888", None)
+
 
-@dataclass(eq=False)  # eq=False as np frames can't be compared using __eq__
 class ZoneStatusFrame:
-    """A frame that may or may not have undergone processing on the server."""
+    """A frame that may or may not have undergone processing on the server.
+
+    One of these is created for every decoded frame of every stream, so it uses
+    __slots__ instead of being a dataclass to keep it small and quick to allocate.
+    """
+
+    __slots__ = ("frame", "tstamp", "zone_statuses", "tracks", "_frame_metadata",
+                 "downscale_factor", "compressed_frame", "_pixmap")
+
+    COMPRESSION_FORMAT = "JPG"
+
+    def __init__(self, frame: Optional[np.ndarray], tstamp: float,
+                 zone_statuses: Optional[Dict[str, ZoneStatus]] = None,
+                 tracks: Optional[List[DetectionTrack]] = None,
+                 frame_metadata: Optional['ZoneStatusFrameMeta'] = None,
+                 downscale_factor: int = 1,
+                 compressed_frame: Optional[bytes] = None):
+        self.frame = frame
+        """Frame as a BGR numpy array, exactly as it was received from the
+        decoder. None if the frame has been compressed"""
+
+        self.tstamp = tstamp
+        """The timestamp of the frame"""
+
+        self.zone_statuses = zone_statuses
+        """ZoneStatuses for the frame"""
+
+        self.tracks = tracks
+        """DetectionTrack history for the frame"""
+
+        self._frame_metadata = frame_metadata
+        """Cache for the frame_metadata property"""
+
+        self.downscale_factor = downscale_factor
+        """How many times smaller the frame is than the stream's resolution. Zone
+        and detection coordinates are always in the stream's resolution"""
+
+        self.compressed_frame = compressed_frame
+        """The frame encoded as a JPEG, if it was compressed to save memory while
+        it waited in a SyncedFrameBuffer"""
+
+        self._pixmap: Optional[QPixmap] = None
+        """Cache for the pixmap property"""
+
+    def __repr__(self):
+        return f"ZoneStatusFrame(tstamp={self.tstamp}, " \
+            f"zone_statuses={self.zone_statuses}, " \
+            f"frame_metadata={self._frame_metadata})"
+
+    @property
+    def frame_metadata(self) -> 'ZoneStatusFrameMeta':
+        """Created on first access, as most frames are dropped without it"""
+        if self._frame_metadata is None:
+            self._frame_metadata = ZoneStatusFrameMeta()
+        return self._frame_metadata
+
+    @frame_metadata.setter
+    def frame_metadata(self, frame_metadata: 'ZoneStatusFrameMeta') -> None:
+        self._frame_metadata = frame_metadata
+
+    @property
+    def pixmap(self) -> QPixmap:
+        """The frame uploaded to a QPixmap.
+
+        The upload happens on first access, so frames that are never displayed are
+        never converted. QPixmaps may only be created in the GUI thread, so this must
+        not be accessed from a SyncedStreamReader's thread.
+        """
+        if self._pixmap is None:
+            if self.compressed_frame is not None:
+                self._pixmap = QPixmap()
+                self._pixmap.loadFromData(self.compressed_frame,
+                                          self.COMPRESSION_FORMAT)
+            else:
+                self._pixmap = self.pixmap_from_numpy_frame(self.frame)
 
-    frame: QPixmap
-    """Frame as a QPixmap"""
+        return self._pixmap
 
-    tstamp: float
-    """The timestamp of the frame"""
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the frame's image data"""
+        if self.compressed_frame is not None:
+            return len(self.compressed_frame)
 
-    zone_statuses: Optional[Dict[str, ZoneStatus]] = None
-    """ZoneStatuses for the frame"""
+        return self.frame.nbytes
 
-    tracks: Optional[List[DetectionTrack]] = None
-    """DetectionTrack history for the frame"""
+    def compress(self, quality: int = 85) -> None:
+        """Replace the raw frame with a JPEG encoding of it.
 
-    frame_metadata: 'ZoneStatusFrameMeta' \
-        = field(default_factory=lambda: ZoneStatusFrameMeta())
+        The JPEG is only decoded if the frame ends up being displayed. Unlike creating
+        a QPixmap, this is safe to do outside of the GUI thread.
 
-    # Cython currently isn't working with @dataclass or NamedTuple, but this
-    # fixes it. There's a PR to fix this, and here's the relevant issue:
-    # https://github.com/cython/cython/issues/2552
-    __annotations__ = {
-        'frame': np.ndarray,
-        'tstamp': float,
-        'zone_statuses': Optional[Dict[str, ZoneStatus]],
-        'tracks': Optional[List[DetectionTrack]],
-        'frame_metadata': 'ZoneStatusFrameMeta',
-    }
+        :param quality: JPEG quality, from 0 to 100
+        """
+        if self.compressed_frame is not None:
+            return
+
+        byte_array = QByteArray()
+        buffer = QBuffer(byte_array)
+        buffer.open(QIODevice.WriteOnly)
+
+        image = self.qimage_from_numpy_frame(self.frame)
+        image.save(buffer, self.COMPRESSION_FORMAT, quality)
+
+        self.compressed_frame = bytes(byte_array)
+        self.frame = None
 
     @staticmethod
-    def pixmap_from_numpy_frame(frame: np.ndarray) -> QPixmap:
-        height, width, channel = frame.shape
-        bytes_per_line = width * 3
-        image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        return QPixmap.fromImage(image)
+    def qimage_from_numpy_frame(frame: np.ndarray) -> QImage:
+        """Wrap a BGR numpy frame in a QImage without copying it.
+
+        The returned QImage references the numpy array's memory, so it must not
+        outlive the array. Qt versions older than 5.14 have no BGR888 format, in
+        which case the channels are swapped into a new image instead.
+        """
+        if frame.strides[1:] != (3, 1):
+            # Pixels within a row must be packed for Qt to read them
+            frame = np.ascontiguousarray(frame)
+
+        height, width, _channels = frame.shape
+        bytes_per_line = frame.strides[0]
+
+        if _QIMAGE_FORMAT_BGR888 is not None:
+            return QImage(frame.data, width, height, bytes_per_line,
+                          _QIMAGE_FORMAT_BGR888)
+
+        image = QImage(frame.data, width, height, bytes_per_line,
+                       QImage.Format_RGB888)
+        return image.rgbSwapped()
+
+    @classmethod
+    def pixmap_from_numpy_frame(cls, frame: np.ndarray) -> QPixmap:
+        """Upload a BGR numpy frame to a QPixmap. This is the only copy of the
+        frame's data made on its way to the screen."""
+        return QPixmap.fromImage(cls.qimage_from_numpy_frame(frame))
 
 
-@dataclass
 class ZoneStatusFrameMeta:
-    no_analysis: bool = False
-    analysis_latency: timedelta = timedelta(seconds=0)
-    client_buffer_full: bool = False
-
-    # Cython currently isn't working with @dataclass or NamedTuple, but this
-    # fixes it. There's a PR to fix this, and here's the relevant issue:
-    # https://github.com/cython/cython/issues/2552
-    __annotations__ = {
-        'no_analysis': bool,
-        'analysis_latency': timedelta,
-        'client_buffer_full': bool
-    }
+    __slots__ = ("no_analysis", "analysis_latency_seconds", "client_buffer_full",
+                 "live", "extrapolation_seconds")
+
+    def __init__(self, no_analysis: bool = False,
+                 analysis_latency_seconds: float = 0,
+                 client_buffer_full: bool = False,
+                 live: bool = False,
+                 extrapolation_seconds: float = 0):
+        self.no_analysis = no_analysis
+
+        self.analysis_latency_seconds = analysis_latency_seconds
+        """Kept as a float, as it's set for every synced frame but rarely read"""
+
+        self.client_buffer_full = client_buffer_full
+
+        self.live = live
+        """Whether the frame was handed out as soon as it was decoded, instead of
+        waiting for its results. Its detections are extrapolated from older
+        results"""
+
+        self.extrapolation_seconds = extrapolation_seconds
+        """How much newer a live frame is than the results it was paired with, which
+        is how far its detections are extrapolated"""
+
+    def __repr__(self):
+        return f"ZoneStatusFrameMeta(no_analysis={self.no_analysis}, " \
+            f"analysis_latency_seconds={self.analysis_latency_seconds}, " \
+            f"client_buffer_full={self.client_buffer_full}, " \
+            f"live={self.live}, " \
+            f"extrapolation_seconds={self.extrapolation_seconds})"
+
+    @property
+    def analysis_latency(self) -> timedelta:
+        return timedelta(seconds=self.analysis_latency_seconds)
+
+    @analysis_latency.setter
+    def analysis_latency(self, analysis_latency: timedelta) -> None:
+        self.analysis_latency_seconds = analysis_latency.total_seconds()
@@ -50,6 +50,9 @@ class RenderConfiguration(QDialog):
         self.recognition_checkbox.setChecked(
             self.render_config.show_recognition_labels)
         self.extra_data_checkbox.setChecked(self.render_config.show_extra_data)
+        self.live_mode_checkbox.setChecked(self.render_config.live_mode)
+        self.batch_detections_checkbox.setChecked(
+            self.render_config.batch_detections)
 
     @classmethod
     def show_dialog(cls, parent):
@@ -81,3 +84,6 @@ class RenderConfiguration(QDialog):
             = dialog.recognition_checkbox.isChecked()
         dialog.render_config.show_extra_data \
             = dialog.extra_data_checkbox.isChecked()
+        dialog.render_config.live_mode = dialog.live_mode_checkbox.isChecked()
+        dialog.render_config.batch_detections \
+            = dialog.batch_detections_checkbox.isChecked()
@@ -110,6 +110,11 @@ class VideoExpandedView(QWidget):
     def open_expanded_view_slot(self, stream_conf: StreamConfiguration):
         """Signaled by thumbnail view when thumbnail video is clicked
         """
+        stream_manager = get_stream_manager()
+        if self.stream_conf is not None:
+            stream_manager.set_stream_expanded(self.stream_conf.id, False)
+        stream_manager.set_stream_expanded(stream_conf.id, True)
+
         self.expanded_video.change_stream(stream_conf)
         self.alert_log.change_stream(stream_conf.id)
         self.stream_conf = stream_conf
@@ -124,6 +129,10 @@ class VideoExpandedView(QWidget):
         # Stop alert log from asking for alerts from stream
         self.alert_log.stop_streaming()
 
+        # Stream no longer needs to be prioritized
+        if self.stream_conf is not None:
+            get_stream_manager().set_stream_expanded(self.stream_conf.id, False)
+
         # No more stream_conf associate with
         self.stream_conf = None
 
@@ -77,6 +77,27 @@ class _BufferFullAlert(AbstractOverlayAlert):
         return QIcon(":/icons/analysis_error")
 
 
+class _ExtrapolatedAnalysisAlert(AbstractOverlayAlert):
+    def short_text(self) -> str:
+        return QApplication.translate("OverlayAlert", "Estimated detections")
+
+    def long_text(self) -> str:
+        message_text1 = QApplication.translate(
+            "OverlayAlert",
+            "Live mode is showing frames before the server has analyzed them.")
+        message_text2 = QApplication.translate(
+            "OverlayAlert",
+            "Detections are estimated from results that are over a second old, "
+            + "and are corrected as new results arrive.")
+        message_text = f"{message_text1}<br>{message_text2}"
+
+        return message_text
+
+    def icon(self) -> QIcon:
+        return QIcon(":/icons/analysis_error")
+
+
 NO_ANALYSIS_ALERT = _NoAnalysisAlert()
 DESYNCED_ANALYSIS_ALERT = _DesyncedAnalysisAlert()
 BUFFER_FULL_ALERT = _BufferFullAlert()
+EXTRAPOLATED_ANALYSIS_ALERT = _ExtrapolatedAnalysisAlert()
@@ -12,6 +12,7 @@ from .stream_widget_overlay_ui import StreamWidgetOverlayUI
 
 class StreamWidgetOverlay(StreamWidgetOverlayUI):
     MIN_DESYNC_LATENCY_ALERT = timedelta(seconds=1)
+    MIN_EXTRAPOLATION_ALERT = timedelta(seconds=1)
 
     def __init__(self, *, parent: QWidget):
         super().__init__(parent=parent)
@@ -37,5 +38,9 @@ class StreamWidgetOverlay(StreamWidgetOverlayUI):
             alerts.append(stream_alerts.DESYNCED_ANALYSIS_ALERT)
         if frame_metadata.client_buffer_full:
             alerts.append(stream_alerts.BUFFER_FULL_ALERT)
+        if frame_metadata.live:
+            extrapolation = timedelta(seconds=frame_metadata.extrapolation_seconds)
+            if extrapolation > self.MIN_EXTRAPOLATION_ALERT:
+                alerts.append(stream_alerts.EXTRAPOLATED_ANALYSIS_ALERT)
 
         return alerts
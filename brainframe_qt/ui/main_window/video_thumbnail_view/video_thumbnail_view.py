@@ -1,6 +1,8 @@
 from typing import Dict, List
 
-from PyQt5.QtCore import QMetaObject, QThread, Q_ARG, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QMetaObject, QThread, QTimer, Q_ARG, Qt, pyqtSignal, \
+    pyqtSlot
+from PyQt5.QtGui import QHideEvent, QResizeEvent, QShowEvent
 from PyQt5.QtWidgets import QWidget
 
 from brainframe.api.bf_codecs import Alert, StreamConfiguration
@@ -16,9 +18,17 @@ from .video_thumbnail_view_ui import _VideoThumbnailViewUI
 class VideoThumbnailView(_VideoThumbnailViewUI):
     stream_clicked = pyqtSignal(StreamConfiguration)
 
+    _VISIBILITY_UPDATE_DELAY_MS = 250
+    """Visibility is only re-checked once the layout has settled for this long, so
+    that scrolling doesn't pause and resume streams in quick succession"""
+
     def __init__(self, parent: QWidget):
         super().__init__(parent)
 
+        self._visibility_timer = QTimer(self)
+        self._visibility_timer.setSingleShot(True)
+        self._visibility_timer.setInterval(self._VISIBILITY_UPDATE_DELAY_MS)
+
         self._init_signals()
 
         self._retrieve_remote_streams()
@@ -34,6 +44,27 @@ class VideoThumbnailView(_VideoThumbnailViewUI):
         self.alertless_stream_layout.thumbnail_stream_clicked_signal.connect(
             self._refresh_active_streams)
 
+        self.alert_stream_layout.stream_layout_changed.connect(
+            self._schedule_visibility_update)
+        self.alertless_stream_layout.stream_layout_changed.connect(
+            self._schedule_visibility_update)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(
+            self._schedule_visibility_update)
+
+        self._visibility_timer.timeout.connect(self._update_stream_visibility)
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self._schedule_visibility_update()
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self._schedule_visibility_update()
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        super().hideEvent(event)
+        self._schedule_visibility_update()
+
     def _init_alert_pubsub(self):
         """Called after streams are initially populated"""
         stream_sub = zss_publisher.subscribe_alerts(self._handle_alerts)
@@ -120,9 +151,29 @@ class VideoThumbnailView(_VideoThumbnailViewUI):
             video_widget = self.alert_stream_layout.pop_stream_widget(stream_id)
             self.alertless_stream_layout.add_video(video_widget)
 
+        stream_manager = get_stream_manager()
+        for stream_id in self.streams:
+            alerting = stream_id in self.alert_stream_layout.stream_widgets
+            stream_manager.set_stream_alerting(stream_id, alerting)
+
     def _refresh_active_streams(self, stream_conf: StreamConfiguration) -> None:
         get_stream_manager().resume_streaming(stream_conf.id)
 
+    def _schedule_visibility_update(self) -> None:
+        self._visibility_timer.start()
+
+    def _update_stream_visibility(self) -> None:
+        """Let the StreamManager know which thumbnails can be seen, so that streams
+        scrolled out of view can be paused"""
+        stream_manager = get_stream_manager()
+        for stream_id, stream_widget in self.streams.items():
+            visible = stream_widget.stream_event_manager.is_displayed
+            stream_manager.set_stream_visible(stream_id, visible)
+
+            # Show frames that arrived while the stream was scrolled out of view
+            if visible:
+                stream_widget.stream_event_manager.deliver_pending()
+
     def _retrieve_remote_streams(self) -> None:
 
         def on_success(stream_confs: List[StreamConfiguration]) -> None:
@@ -23,6 +23,15 @@ class ThumbnailGridLayout(QWidget):
       [parent].ongoing_alerts_slot
     """
 
+    stream_layout_changed = pyqtSignal()
+    """Streams were added, removed, rearranged, shown, or hidden, so which streams
+    are visible may have changed
+
+    Connected to:
+    - VideoThumbnailView -- Dynamic
+      [parent]._schedule_visibility_update
+    """
+
     def __init__(self, parent=None, grid_num_columns=3):
         super().__init__(parent=parent)
 
@@ -66,6 +75,8 @@ class ThumbnailGridLayout(QWidget):
 
         self._set_layout_equal_stretch()
 
+        self.stream_layout_changed.emit()
+
     def _add_widget_to_layout(self, widget):
         row, col = divmod(self.grid_layout.count(), self._grid_num_columns)
 
@@ -161,6 +172,8 @@ class ThumbnailGridLayout(QWidget):
 
         self.layout_container.setVisible(expand)
 
+        self.stream_layout_changed.emit()
+
     @pyqtProperty(int)
     def grid_num_columns(self):
         return self._grid_num_columns
@@ -179,6 +192,8 @@ class ThumbnailGridLayout(QWidget):
 
         self._set_layout_equal_stretch()
 
+        self.stream_layout_changed.emit()
+
     @pyqtProperty(str)
     def layout_name(self):
         return self._layout_name
@@ -47,3 +47,13 @@ class RenderSettings(SettingsManager):
         default=False,
         type_=bool,
     )
+    live_mode = Setting(
+        name="video_live_mode",
+        default=False,
+        type_=bool,
+    )
+    batch_detections = Setting(
+        name="video_batch_detections",
+        default=False,
+        type_=bool,
+    )
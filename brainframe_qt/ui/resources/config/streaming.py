@@ -2,4 +2,27 @@ from brainframe_qt.ui.resources.settings import Setting, SettingsManager
 
 
 class StreamingSettings(SettingsManager):
-    frame_buffer_size = Setting(name="frame_buffer_size", default=300, type_=int)
+    frame_buffer_mb = Setting(name="frame_buffer_mb", default=1024, type_=int)
+    frame_buffer_size = Setting(name="frame_buffer_size", default=0, type_=int)
+    """Replaced by frame_buffer_mb. A limit in frames set by older versions, which
+    the frame buffer converts once and removes. 0 if there is none"""
+    adaptive_frame_buffer = Setting(
+        name="adaptive_frame_buffer",
+        default=False,
+        type_=bool,
+    )
+    compress_buffered_frames = Setting(
+        name="compress_buffered_frames",
+        default=False,
+        type_=bool,
+    )
+    snapshot_paused_streams = Setting(
+        name="snapshot_paused_streams",
+        default=True,
+        type_=bool,
+    )
+    multiprocess_decoding = Setting(
+        name="multiprocess_decoding",
+        default=False,
+        type_=bool,
+    )
@@ -1,5 +1,6 @@
 from .arrow_item import ArrowItem
 from .circle_item import CircleItem
+from .label_cache import LabelCache, LabelLayout, label_cache
 from .label_item import LabelItem
 from .line_item import LineItem
 from .polygon_item import PolygonItem
@@ -44,6 +44,10 @@ class ArrowItem(VideoItem):
             parent=self
         )
 
+    def set_color(self, color: QColor) -> None:
+        for line in (self._base_line, self._chevron_left, self._chevron_right):
+            line.color = color
+
     @property
     def _chevron_left_endpoint(self) -> VideoItem.PointType:
         return self._rotate_offset(self.CHEVRON_ANGLE, self.CHEVRON_LENGTH)
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QPointF, QRectF, QSizeF, Qt
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QStaticText
+
+
+class LabelLayout:
+    """A label's text, elided and laid out once so that it can be drawn any number
+    of times. Must not be modified, as layouts are shared between labels"""
+
+    __slots__ = ("text", "font", "lines", "line_height", "margin", "size")
+
+    def __init__(self, text: str, max_width: Optional[int], *, font: QFont,
+                 font_metrics: QFontMetrics, margin: int):
+        elided_lines = text.split("\n")
+        if max_width is not None:
+            elided_lines = [
+                font_metrics.elidedText(line, Qt.ElideRight, max_width)
+                for line in elided_lines
+            ]
+
+        self.text = "\n".join(elided_lines)
+        """The text as it's shown, with lines that are too long elided"""
+
+        self.font = font
+
+        # QStaticText doesn't break lines, so each line gets its own
+        self.lines: List[QStaticText] = []
+        for line in elided_lines:
+            static_text = QStaticText(line)
+            static_text.setTextFormat(Qt.PlainText)
+            static_text.prepare(font=font)
+            self.lines.append(static_text)
+
+        self.line_height = font_metrics.height()
+        self.margin = margin
+
+        text_width = max(font_metrics.horizontalAdvance(line)
+                         for line in elided_lines)
+        text_height = self.line_height * len(self.lines)
+        self.size = QSizeF(text_width + 2 * margin, text_height + 2 * margin)
+        """Size of the label's background, including its margins"""
+
+    def paint_background(self, painter: QPainter, position: QPointF,
+                         color: QColor, opacity: float) -> None:
+        painter.setOpacity(opacity)
+        painter.setPen(color)
+        painter.setBrush(color)
+        painter.drawRect(QRectF(position, self.size))
+
+    def paint_text(self, painter: QPainter, position: QPointF,
+                   color: QColor) -> None:
+        painter.setPen(color)
+        painter.setFont(self.font)
+
+        line_position = position + QPointF(self.margin, self.margin)
+        for line in self.lines:
+            painter.drawStaticText(line_position, line)
+            line_position.setY(line_position.y() + self.line_height)
+
+
+class LabelCache:
+    """Label layouts, shared by every label so that text that's shown again, such
+    as on the next frame, doesn't have to be laid out again. Font metrics are
+    computed once per font.
+
+    Colors aren't part of a layout, as QStaticText is drawn in the painter's color.
+    """
+
+    MARGIN = 4
+    """Space around a label's text. Matches the default document margin of a
+    QGraphicsTextItem"""
+
+    MAX_CACHED_LAYOUTS = 1000
+    """The cache is cleared when it grows past this many layouts"""
+
+    ELIDE_WIDTH_STEP = 16
+    """Widths that text is elided to are rounded down to a multiple of this. Labels
+    of moving detections get a slightly different max width on every frame, and
+    would otherwise rarely reuse a layout"""
+
+    def __init__(self):
+        self._layouts: Dict[Tuple[str, Optional[int], str], LabelLayout] = {}
+        """Layouts by their text, max width and font key"""
+
+        self._font_metrics: Dict[str, QFontMetrics] = {}
+        """Metrics by font key"""
+
+        self._default_font: Optional[QFont] = None
+        """Created on first use, as fonts need a QGuiApplication"""
+
+    def layout(self, text: str, max_width: Optional[int] = None,
+               font: Optional[QFont] = None) -> LabelLayout:
+        """Get the layout of a label's text
+
+        :param max_width: Lines wider than this are elided, to the nearest multiple
+            of ELIDE_WIDTH_STEP below it. None for no limit
+        :param font: The font to lay out the text in. Defaults to the application
+            font
+        """
+        if font is None:
+            font = self.default_font
+
+        if max_width is not None:
+            # Text that fits doesn't depend on the max width at all
+            full_layout = self._layout(text, None, font)
+            if full_layout.size.width() - 2 * self.MARGIN <= max_width:
+                return full_layout
+
+            max_width -= max_width % self.ELIDE_WIDTH_STEP
+
+        return self._layout(text, max_width, font)
+
+    def font_metrics(self, font: QFont) -> QFontMetrics:
+        font_key = font.key()
+
+        font_metrics = self._font_metrics.get(font_key)
+        if font_metrics is None:
+            font_metrics = self._font_metrics[font_key] = QFontMetrics(font)
+
+        return font_metrics
+
+    @property
+    def default_font(self) -> QFont:
+        if self._default_font is None:
+            self._default_font = QFont()
+        return self._default_font
+
+    def _layout(self, text: str, max_width: Optional[int],
+                font: QFont) -> LabelLayout:
+        cache_key = (text, max_width, font.key())
+        layout = self._layouts.get(cache_key)
+        if layout is None:
+            if len(self._layouts) >= self.MAX_CACHED_LAYOUTS:
+                self._layouts.clear()
+
+            layout = LabelLayout(text, max_width, font=font,
+                                 font_metrics=self.font_metrics(font),
+                                 margin=self.MARGIN)
+            self._layouts[cache_key] = layout
+
+        return layout
+
+
+label_cache = LabelCache()
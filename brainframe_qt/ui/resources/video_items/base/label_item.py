@@ -1,15 +1,21 @@
 from typing import Optional
 
-from PyQt5.QtCore import QPointF, Qt
-from PyQt5.QtGui import QColor, QFont, QFontMetrics
-from PyQt5.QtWidgets import QGraphicsRectItem, QGraphicsTextItem
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtGui import QColor, QPainter
 
 from brainframe_qt.ui.resources.ui_elements.constants import \
     QColorConstants
+from .label_cache import LabelLayout, label_cache
 from .video_item import VideoItem
 
 
 class LabelItem(VideoItem):
+    """Text on a translucent background.
+
+    Paints itself from a cached LabelLayout, so labels with the same text share one
+    layout, and changing a label to text that has been shown before doesn't lay it
+    out again.
+    """
     TEXT_COLOR = QColorConstants.White
     BACKGROUND_OPACITY = 0.35
 
@@ -22,50 +28,51 @@ class LabelItem(VideoItem):
         self.max_width = max_width
         self.background_color = color
 
-        self.text_item = self._init_text_item()
-        self.background_box_item = self._init_background_box_item()
+        self._layout: LabelLayout = label_cache.layout(text, max_width)
 
         self.setPos(QPointF(*position))
 
-    def _init_text_item(self):
-        text_item = QGraphicsTextItem(self.formatted_text, parent=self)
-        text_item.setDefaultTextColor(self.TEXT_COLOR)
+    def set_text(self, text: str, max_width: Optional[int] = None) -> None:
+        """Change the label's text in place, resizing its background to fit"""
+        if text == self._text and max_width == self.max_width:
+            return
+
+        self._text = text
+        self.max_width = max_width
+
+        # A slightly different max width often leads to the same layout
+        layout = label_cache.layout(text, max_width)
+        if layout is self._layout:
+            return
 
-        return text_item
+        self.prepareGeometryChange()
+        self._layout = layout
+        self.update()
 
-    def _init_background_box_item(self):
-        # TODO: Abstract
-        rect = self.text_item.boundingRect()
-        background_box_item = QGraphicsRectItem(rect, parent=self)
+    def set_background_color(self, color: QColor) -> None:
+        if color == self.background_color:
+            return
 
-        brush = background_box_item.brush()
-        brush.setColor(self.background_color)
-        brush.setStyle(Qt.SolidPattern)
-        background_box_item.setBrush(brush)
+        self.background_color = color
+        self.update()
 
-        pen = background_box_item.pen()
-        pen.setColor(self.background_color)
-        background_box_item.setPen(pen)
+    def boundingRect(self) -> QRectF:
+        return QRectF(QPointF(0, 0), self._layout.size)
 
-        background_box_item.setOpacity(self.BACKGROUND_OPACITY)
+    def paint(self, painter: QPainter, _option, _widget=None) -> None:
+        origin = QPointF(0, 0)
 
-        # Force background behind text_item
-        background_box_item.stackBefore(self.text_item)
+        # The item's own opacity is already applied to the painter
+        opacity = painter.opacity()
+        self._layout.paint_background(painter, origin, self.background_color,
+                                      opacity * self.BACKGROUND_OPACITY)
 
-        return background_box_item
+        painter.setOpacity(opacity)
+        self._layout.paint_text(painter, origin, self.TEXT_COLOR)
 
     @property
     def formatted_text(self) -> str:
-        text = self._text
-
-        if self.max_width is not None:
-            metric = QFontMetrics(QFont())
-            text = "\n".join(
-                metric.elidedText(line, Qt.ElideRight, self.max_width)
-                for line in text.split("\n")
-            )
-
-        return text
+        return self._layout.text
 
     @property
     def raw_text(self) -> str:
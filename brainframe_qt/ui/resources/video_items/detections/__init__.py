@@ -1,2 +1,3 @@
 from .detection_item import DetectionItem
 from .detection_polygon_item import DetectionPolygonItem
+from .detection_overlay_item import DetectionOverlayItem
@@ -1,6 +1,8 @@
 import random
 from typing import Dict, Optional
 
+import numpy as np
+
 from PyQt5.QtGui import QColor
 from brainframe.api.bf_codecs import Detection
 
@@ -16,6 +18,7 @@ class DetectionItem(VideoItem):
     _qcolor_cache: Dict[str, QColor] = {}
 
     def __init__(self, detection: Detection, *,
+                 coords: Optional[np.ndarray] = None,
                  track: Optional[DetectionTrack],
                  render_config: RenderSettings,
                  parent: Optional[VideoItem] = None):
@@ -23,24 +26,69 @@ class DetectionItem(VideoItem):
 
         self.detection = detection
         self.track = track
+        self.render_config = render_config
+
+        if coords is None:
+            coords = np.array(detection.coords, dtype=np.float64)
+        self.coords = coords
+        """Where to draw the detection, which may differ from the detection's own
+        coordinates if it was interpolated"""
 
         self.detection_polygon = DetectionPolygonItem(
-            detection, self.draw_color,
+            detection, self.draw_color, coords=coords,
             render_config=render_config, parent=self)
         self.detection_label = DetectionLabelItem(
-            detection, self.draw_color,
+            detection, self.draw_color, coords=coords,
             render_config=render_config, parent=self)
 
         self.detection_track: Optional[DetectionTrackItem] = None
         if render_config.show_detection_tracks:
             self.detection_track = DetectionTrackItem(track, parent=self)
 
+    def set_detection(self, detection: Detection, *,
+                      coords: Optional[np.ndarray] = None,
+                      track: Optional[DetectionTrack]) -> None:
+        """Show a new detection with this item, updating its child items in place
+        instead of creating new ones"""
+        self.detection = detection
+        self.track = track
+
+        if coords is None:
+            coords = np.array(detection.coords, dtype=np.float64)
+        self.coords = coords
+
+        color = self.draw_color
+        self.detection_polygon.set_detection(detection, color, coords=coords)
+        self.detection_label.set_detection(detection, color, coords=coords)
+
+        if not self.render_config.show_detection_tracks:
+            if self.detection_track is not None:
+                self._remove_track_item()
+        elif self.detection_track is None:
+            self.detection_track = DetectionTrackItem(track, parent=self)
+        else:
+            self.detection_track.track = track
+
+    def _remove_track_item(self) -> None:
+        scene = self.scene()
+        if scene is not None:
+            scene.removeItem(self.detection_track)
+        else:
+            self.detection_track.setParentItem(None)
+
+        self.detection_track = None
+
     @property
     def draw_color(self) -> QColor:
-        seed = self.detection.class_name
-        if seed not in self._qcolor_cache:
+        return self.class_color(self.detection.class_name)
+
+    @classmethod
+    def class_color(cls, class_name: str) -> QColor:
+        """The color that detections of a class are drawn in"""
+        seed = class_name
+        if seed not in cls._qcolor_cache:
             rand_seed = random.Random(seed)
             hue = rand_seed.random()
-            self._qcolor_cache[seed] = QColor.fromHsvF(hue, 1.0, 1.0)
+            cls._qcolor_cache[seed] = QColor.fromHsvF(hue, 1.0, 1.0)
 
-        return self._qcolor_cache[seed]
+        return cls._qcolor_cache[seed]
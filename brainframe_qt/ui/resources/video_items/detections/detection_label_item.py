@@ -1,5 +1,7 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+from PyQt5.QtCore import QPointF
 from PyQt5.QtGui import QColor
 from brainframe.api.bf_codecs import Detection
 
@@ -10,10 +12,20 @@ from brainframe_qt.ui.resources.video_items.base import LabelItem, VideoItem
 class DetectionLabelItem(LabelItem):
     MIN_WIDTH = 150
 
+    MAX_CACHED_TEXTS = 1000
+    """The text cache is cleared when it grows past this many texts"""
+
+    _text_cache: Dict[int, Tuple[Detection, Tuple[bool, ...], str]] = {}
+    """The text of recent detections' labels, by the detection's ID. Each entry
+    keeps its detection alive, so that the ID can't be reused by another one
+    while it's cached"""
+
     def __init__(self, detection: Detection, color: QColor,
-                 *, render_config: RenderSettings, parent: VideoItem):
+                 *, coords: np.ndarray, render_config: RenderSettings,
+                 parent: VideoItem):
 
         self.detection = detection
+        self.coords = coords
         self.render_config = render_config
 
         super().__init__(self.text, self._detection_pos,
@@ -22,37 +34,86 @@ class DetectionLabelItem(LabelItem):
 
         # TODO: background opacity
 
+    def set_detection(self, detection: Detection, color: QColor, *,
+                      coords: np.ndarray) -> None:
+        """Move the label to a new detection, reusing this item. The text is only
+        laid out again if it changed"""
+        self.detection = detection
+        self.coords = coords
+
+        self.set_text(self.text, max_width=self._max_label_width)
+        self.set_background_color(color)
+        self.setPos(QPointF(*self._detection_pos))
+
     @property
     def _detection_pos(self) -> Tuple[int, int]:
         # Naive. Maybe refine for non-rectangular detections in future?
-        top_left = self.detection.coords[0]
+        top_left = self.coords[0]
 
         # noinspection PyTypeChecker
-        return tuple(top_left)
+        return tuple(top_left.tolist())
 
     @property
-    def text(self):
+    def text(self) -> str:
+        return self.format_text(self.detection, self.render_config)
+
+    @classmethod
+    def format_text(cls, detection: Detection,
+                    render_config: RenderSettings) -> str:
+        """The text of a detection's label, as shown with the given settings.
+
+        Interpolated detections keep the Detection of their track's result, so the
+        text is cached by Detection, and only formatted once per result.
+        """
+        settings = (
+            render_config.show_detection_labels,
+            render_config.show_recognition_labels,
+            render_config.show_attributes,
+            render_config.show_extra_data,
+        )
+        show_labels, show_recognition, show_attributes, show_extra_data = settings
+
+        cached = cls._text_cache.get(id(detection))
+        if cached is not None:
+            cached_detection, cached_settings, text = cached
+            if cached_detection is detection and cached_settings == settings:
+                return text
+
         text_items = []
 
-        if self.render_config.show_detection_labels:
-            text_items.append(self._detection_name_text)
-        if self.render_config.show_recognition_labels:
-            text_items.append(self._recognition_text)
-        if self.render_config.show_attributes:
-            text_items.append(self._attributes_text)
-        if self.render_config.show_extra_data:
-            text_items.append(self._extra_data_text)
+        if show_labels:
+            text_items.append(cls._detection_name_text(detection))
+        if show_recognition:
+            text_items.append(cls._recognition_text(detection))
+        if show_attributes:
+            text_items.append(cls._attributes_text(detection))
+        if show_extra_data:
+            text_items.append(cls._extra_data_text(detection))
 
         text = "\n".join(filter(None.__ne__, text_items))
+
+        if len(cls._text_cache) >= cls.MAX_CACHED_TEXTS:
+            cls._text_cache.clear()
+        cls._text_cache[id(detection)] = (detection, settings, text)
+
         return text
 
-    @property
-    def _detection_name_text(self):
-        return self.detection.class_name
+    @classmethod
+    def max_label_width(cls, coords: np.ndarray) -> int:
+        """The widest a label may be for a detection at the given coordinates"""
+        # Naive. Maybe refine for non-rectangular detections in future?
+        x_coords = coords[:, 0]
+        detection_width = int(x_coords.max() - x_coords.min())
 
-    @property
-    def _recognition_text(self) -> Optional[str]:
-        identity = self.detection.with_identity
+        return max(cls.MIN_WIDTH, detection_width)
+
+    @staticmethod
+    def _detection_name_text(detection: Detection) -> str:
+        return detection.class_name
+
+    @staticmethod
+    def _recognition_text(detection: Detection) -> Optional[str]:
+        identity = detection.with_identity
 
         if identity is None:
             return None
@@ -61,13 +122,13 @@ class DetectionLabelItem(LabelItem):
         unique_name = identity.unique_name
         name = unique_name if nickname is None else nickname
 
-        confidence = self.detection.extra_data['encoding_distance']
+        confidence = detection.extra_data['encoding_distance']
 
         return f"{name} ({round(confidence, 2)})"
 
-    @property
-    def _attributes_text(self) -> Optional[str]:
-        attributes = self.detection.attributes
+    @staticmethod
+    def _attributes_text(detection: Detection) -> Optional[str]:
+        attributes = detection.attributes
 
         attribute_strings = sorted(f"{key}: {val}"
                                    for key, val in attributes.items())
@@ -76,9 +137,9 @@ class DetectionLabelItem(LabelItem):
 
         return attribute_text or None
 
-    @property
-    def _extra_data_text(self) -> Optional[str]:
-        extra_data = self.detection.extra_data
+    @staticmethod
+    def _extra_data_text(detection: Detection) -> Optional[str]:
+        extra_data = detection.extra_data
 
         extra_data_strings: List[str] = []
         for key, val in extra_data.items():
@@ -92,7 +153,4 @@ class DetectionLabelItem(LabelItem):
 
     @property
     def _max_label_width(self) -> int:
-        # Naive. Maybe refine for non-rectangular detections in future?
-        detection_width = self.detection.bbox[1][0] - self.detection.bbox[0][0]
-
-        return max(self.MIN_WIDTH, detection_width)
+        return self.max_label_width(self.coords)
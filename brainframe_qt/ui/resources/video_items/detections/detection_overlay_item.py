@@ -0,0 +1,170 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QStyleOptionGraphicsItem, QWidget
+from brainframe.api.bf_codecs import Detection
+
+from brainframe_qt.api_utils.detection_tracks import DetectionTrack
+from brainframe_qt.ui.resources.config import RenderSettings
+from brainframe_qt.ui.resources.video_items.base import LabelItem, \
+    LabelLayout, VideoItem, label_cache
+from .detection_item import DetectionItem
+from .detection_label_item import DetectionLabelItem
+from .detection_polygon_item import DetectionPolygonItem
+from .detection_track_item import DetectionTrackItem, TrackPolyline, \
+    generate_unique_qcolor
+
+
+class DetectionOverlayItem(VideoItem):
+    """Draws all of a frame's detections as a single item.
+
+    An alternative to a DetectionItem per detection, which takes about six
+    QGraphicsItems each. The scene only has this one item to index, and everything
+    is painted in a single paint() call, with shapes grouped by color so that the
+    pen only changes once per color. Label layouts come from the same cache as
+    LabelItem's.
+    """
+
+    def __init__(self, *, render_config: RenderSettings,
+                 parent: Optional[VideoItem] = None):
+        super().__init__(parent=parent)
+
+        self.render_config = render_config
+
+        self._polygons: Dict[int, Tuple[QColor, List[QPolygonF]]] = {}
+        """Detection outlines, by the RGBA value of their color"""
+
+        self._track_lines: Dict[int, Tuple[QColor, List[QPolygonF]]] = {}
+        """Track lines, by the RGBA value of their color"""
+
+        self._labels: List[Tuple[QPointF, QColor, LabelLayout]] = []
+        """The position, background color and layout of each label"""
+
+        self._bounding_rect = QRectF()
+
+        self._track_polylines: Dict[UUID, TrackPolyline] = {}
+        """Lines of the tracks being drawn, by track ID. Kept between frames so
+        that they only need to be extended with new points"""
+
+    def set_detections(self, detections: Sequence[Detection],
+                       coords: Sequence[np.ndarray],
+                       tracks: Sequence[DetectionTrack]) -> None:
+        """Replace the detections being drawn
+
+        :param detections: The detections to draw
+        :param coords: Where to draw each detection, such as interpolated
+            coordinates
+        :param tracks: Each detection's track
+        """
+        self.prepareGeometryChange()
+
+        self._polygons = {}
+        self._track_lines = {}
+        self._labels = []
+        bounding_rect = QRectF()
+
+        show_tracks = self.render_config.show_detection_tracks
+        prev_track_polylines = self._track_polylines
+        self._track_polylines = {}
+
+        for detection, detection_coords, track in zip(detections, coords, tracks):
+            color = DetectionItem.class_color(detection.class_name)
+
+            outline = QPolygonF([
+                QPointF(x, y) for x, y in
+                DetectionPolygonItem.outline_points(detection_coords,
+                                                    self.render_config)
+            ])
+            self._add_line(self._polygons, color, outline)
+            bounding_rect |= outline.boundingRect()
+
+            if show_tracks:
+                track_line = self._update_track_polyline(
+                    track, prev_track_polylines)
+                track_color = generate_unique_qcolor(str(track.track_id))
+                self._add_line(self._track_lines, track_color, track_line)
+                bounding_rect |= track_line.boundingRect()
+
+            text = DetectionLabelItem.format_text(detection, self.render_config)
+            if text:
+                max_width = DetectionLabelItem.max_label_width(detection_coords)
+                label = label_cache.layout(text, max_width)
+
+                # Labels hang off of the detection's first point
+                position = QPointF(*detection_coords[0].tolist())
+                self._labels.append((position, color, label))
+                bounding_rect |= QRectF(position, label.size)
+
+        # Leave room for the pen, which is centered on the lines
+        pen_margin = DetectionTrackItem.LINE_THICKNESS
+        self._bounding_rect = bounding_rect.adjusted(
+            -pen_margin, -pen_margin, pen_margin, pen_margin)
+
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self._bounding_rect
+
+    def paint(self, painter: QPainter, _option: QStyleOptionGraphicsItem,
+              _widget: Optional[QWidget] = None) -> None:
+        pen = QPen()
+        pen.setJoinStyle(Qt.RoundJoin)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setBrush(Qt.NoBrush)
+
+        for color, outlines in self._polygons.values():
+            pen.setColor(color)
+            painter.setPen(pen)
+            for outline in outlines:
+                painter.drawPolygon(outline)
+
+        # Track lines are drawn with DetectionTrackItem's default joins and caps,
+        # which are cheaper to stroke than round ones
+        pen = QPen()
+        pen.setWidth(DetectionTrackItem.LINE_THICKNESS)
+        for color, track_lines in self._track_lines.values():
+            pen.setColor(color)
+            painter.setPen(pen)
+            for track_line in track_lines:
+                painter.drawPolyline(track_line)
+
+        if not self._labels:
+            return
+
+        # All label backgrounds first, so that the opacity only changes twice
+        opacity = painter.opacity()
+        for position, color, label in self._labels:
+            label.paint_background(painter, position, color,
+                                   opacity * LabelItem.BACKGROUND_OPACITY)
+
+        painter.setOpacity(opacity)
+        for position, _color, label in self._labels:
+            label.paint_text(painter, position, LabelItem.TEXT_COLOR)
+
+    def _update_track_polyline(
+            self, track: DetectionTrack,
+            prev_track_polylines: Dict[UUID, TrackPolyline]) -> QPolygonF:
+        track_id = track.track_id
+
+        track_polyline = prev_track_polylines.get(track_id)
+        if track_polyline is None:
+            track_polyline = TrackPolyline(
+                max_age=DetectionTrackItem.MAX_TRACK_AGE)
+        track_polyline.update(track)
+
+        # Untracked detections get a new line each time
+        if track_id is not None:
+            self._track_polylines[track_id] = track_polyline
+
+        return track_polyline.polygon
+
+    @staticmethod
+    def _add_line(lines_by_color: Dict[int, Tuple[QColor, List[QPolygonF]]],
+                  color: QColor, line: QPolygonF) -> None:
+        color_key = color.rgba()
+        if color_key not in lines_by_color:
+            lines_by_color[color_key] = (color, [])
+        lines_by_color[color_key][1].append(line)
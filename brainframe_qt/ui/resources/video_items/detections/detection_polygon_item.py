@@ -1,5 +1,6 @@
 from typing import List
 
+import numpy as np
 from PyQt5.QtGui import QColor
 from brainframe.api.bf_codecs import Detection
 
@@ -11,17 +12,38 @@ from brainframe_qt.ui.resources.video_items.base import PolygonItem, \
 class DetectionPolygonItem(PolygonItem):
 
     def __init__(self, detection: Detection, color: QColor, *,
+                 coords: np.ndarray,
                  render_config: RenderSettings,
                  parent: VideoItem):
         self.detection = detection
+        self.coords = coords
         self.render_config = render_config
 
         super().__init__(self.polygon_points,
                          border_color=color, parent=parent)
 
+    def set_detection(self, detection: Detection, color: QColor, *,
+                      coords: np.ndarray) -> None:
+        """Move the polygon to a new detection, reusing this item"""
+        self.detection = detection
+        self.coords = coords
+
+        self.points = self.polygon_points
+        if color != self.border_color:
+            self.border_color = color
+
     @property
     def polygon_points(self) -> List[VideoItem.PointType]:
-        if self.render_config.use_polygons:
-            return self.detection.coords
+        return self.outline_points(self.coords, self.render_config)
+
+    @staticmethod
+    def outline_points(coords: np.ndarray, render_config: RenderSettings) \
+            -> List[VideoItem.PointType]:
+        """The points of a detection's outline, as shown with the given
+        settings"""
+        if render_config.use_polygons:
+            return coords.tolist()
         else:
-            return self.detection.bbox
+            min_x, min_y = coords.min(axis=0).tolist()
+            max_x, max_y = coords.max(axis=0).tolist()
+            return [[min_x, min_y], [max_x, min_y], [max_x, max_y], [min_x, max_y]]
@@ -1,7 +1,10 @@
 import random
 import typing
-from typing import List
+from collections import deque
+from typing import Deque, Optional
+from uuid import UUID
 
+import numpy as np
 from PyQt5.QtCore import QPointF
 from PyQt5.QtGui import QColor, QPainterPath, QPolygonF
 from PyQt5.QtWidgets import QGraphicsPathItem
@@ -20,6 +23,7 @@ class DetectionTrackItem(QGraphicsPathItem):
 
         self._color = typing.cast(QColor, None)
         self._track = typing.cast(DetectionTrack, None)
+        self._polyline = TrackPolyline(max_age=self.MAX_TRACK_AGE)
         self.track = track
 
         self._thickness = typing.cast(int, None)
@@ -32,26 +36,16 @@ class DetectionTrackItem(QGraphicsPathItem):
     @track.setter
     def track(self, track: DetectionTrack):
         self._track = track
-        self.color = generate_unique_qcolor(str(track.track_id))
 
-        line_coords: List[QPointF] = []
-        for prev_det, detection_tstamp in track:
-            # Find the point of the detection closest to the screens bottom
-            if track.latest_tstamp - detection_tstamp > self.MAX_TRACK_AGE:
-                break
-            coord_a, coord_b = sorted(prev_det.coords,
-                                      key=lambda pt: -pt[1])[:2]
+        color = generate_unique_qcolor(str(track.track_id))
+        if color != self._color:
+            self.color = color
 
-            # The midpoint will be the next point in our line
-            midpoint = [(coord_a[0] + coord_b[0]) / 2,
-                        (coord_a[1] + coord_b[1]) / 2]
-            line_coords.append(QPointF(*midpoint))
+        if self._polyline.update(track):
+            painter_path = QPainterPath()
+            painter_path.addPolygon(self._polyline.polygon)
 
-        polygon = QPolygonF(line_coords)
-        painter_path = QPainterPath()
-        painter_path.addPolygon(polygon)
-
-        self.setPath(painter_path)
+            self.setPath(painter_path)
 
     @property
     def color(self) -> QColor:
@@ -80,6 +74,83 @@ class DetectionTrackItem(QGraphicsPathItem):
         self.setPen(pen)
 
 
+class TrackPolyline:
+    """The line that a track's object moved along in the last max_age seconds,
+    through the bottom midpoints of its detections, oldest first.
+
+    Kept up to date as the track grows: new points are appended and stale ones
+    trimmed from the front, so an update costs O(new points) instead of walking
+    the track's whole history.
+    """
+
+    __slots__ = ("max_age", "polygon", "_tstamps", "_track_id")
+
+    def __init__(self, *, max_age: float):
+        self.max_age = max_age
+
+        self.polygon = QPolygonF()
+
+        self._tstamps: Deque[float] = deque()
+        """The timestamp of each point in the polygon"""
+
+        self._track_id: Optional[UUID] = None
+        """The track that the line was last updated with"""
+
+    def update(self, track: DetectionTrack) -> bool:
+        """Bring the line up to date with a newer snapshot of its track, or
+        rebuild it for a different track
+
+        :return: Whether the line changed
+        """
+        tstamps = track.tstamps
+        cutoff_tstamp = tstamps[-1] - self.max_age
+
+        start = self._continuation_index(track)
+        if start is None:
+            start = int(np.searchsorted(tstamps, cutoff_tstamp))
+            self.polygon = QPolygonF()
+            self._tstamps.clear()
+            changed = True
+        else:
+            changed = start < len(tstamps)
+
+        self._track_id = track.track_id
+
+        new_midpoints = track.bottom_midpoints[start:].tolist()
+        for (x, y), tstamp in zip(new_midpoints, tstamps[start:].tolist()):
+            self.polygon.append(QPointF(x, y))
+            self._tstamps.append(tstamp)
+
+        num_stale = 0
+        while self._tstamps and self._tstamps[0] < cutoff_tstamp:
+            self._tstamps.popleft()
+            num_stale += 1
+        if num_stale:
+            self.polygon.remove(0, num_stale)
+            changed = True
+
+        return changed
+
+    def _continuation_index(self, track: DetectionTrack) -> Optional[int]:
+        """If the track continues the one the line was built from, the index of
+        its first detection that isn't in the line yet"""
+        # Untracked detections can't be told apart
+        if track.track_id is None or track.track_id != self._track_id:
+            return None
+        if not self._tstamps:
+            return None
+
+        tstamps = track.tstamps
+        latest_shown = self._tstamps[-1]
+
+        index = int(np.searchsorted(tstamps, latest_shown))
+        if index == len(tstamps) or tstamps[index] != latest_shown:
+            # The track's history was restarted
+            return None
+
+        return index + 1
+
+
 _qcolor_cache = {}
 
 
@@ -1,8 +1,10 @@
 import logging
-from threading import Event
-from typing import Optional
+import time
+from typing import Optional, Tuple
 
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QGuiApplication
+from PyQt5.QtWidgets import QWidget
 
 from brainframe.api.bf_codecs import StreamConfiguration
 from brainframe.api.bf_errors import StreamConfigNotFoundError, StreamNotOpenedError
@@ -26,33 +28,61 @@ class StreamEventManager(QObject):
 
     frame_received = pyqtSignal(ZoneStatusFrame)
 
-    VIDEO_FRAME_RATE = 30
-    """Frame rate of polling loop in FPS"""
+    DEFAULT_REFRESH_RATE = 60
+    """Refresh rate in Hz to assume if the screen's can't be determined"""
 
     def __init__(self, *, parent: QObject):
-        """Manages events from the stream's SyncedStreamReader"""
+        """Manages events from the stream's SyncedStreamReader.
+
+        Events are pushed from the SyncedStreamReader's thread through queued
+        signals, so they're handled in the GUI thread. Frames are handed out at most
+        once per display refresh, and not at all while the widget can't be seen.
+        """
         super().__init__(parent=parent)
 
-        self._frame_event = Event()
-        self._status_event = Event()
+        self._frame_pending = False
+        """Whether there is a frame that hasn't been handed out yet"""
+        self._status_pending = False
+
+        self._last_frame_delivery = 0.0
+        """time.perf_counter() of the last time a frame was handed out"""
 
         self.stream_conf: Optional[StreamConfiguration] = None
         self.stream_reader: Optional[SyncedStreamReader] = None
 
-        self._event_timer = self._init_event_timer()
+        self._display_size: Optional[Tuple[int, int]] = None
+        """(width, height) in pixels that frames are displayed at"""
+        self._live_mode = False
+        """Whether frames are handed out as soon as they're decoded, instead of once
+        they're synced with their results"""
+
+        self._refresh_timer = self._init_refresh_timer()
 
         self._init_signals()
 
-    def _init_event_timer(self) -> QTimer:
+    def _init_refresh_timer(self) -> QTimer:
+        """Used to hold back frames that arrive too soon after the previous one"""
         timer = QTimer(parent=self)
 
-        timer.setInterval(1000 // self.VIDEO_FRAME_RATE)
-        timer.start()
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.PreciseTimer)
 
         return timer
 
     def _init_signals(self) -> None:
-        self._event_timer.timeout.connect(self._process_events)
+        self._refresh_timer.timeout.connect(self._deliver_events)
+
+    @property
+    def is_displayed(self) -> bool:
+        """Whether the widget that frames are handed to can currently be seen.
+
+        Frames are only handed out (and thus uploaded to a QPixmap) while this is True
+        """
+        widget = self.parent()
+        if not isinstance(widget, QWidget):
+            return True
+
+        return widget.isVisible() and not widget.visibleRegion().isEmpty()
 
     @property
     def is_streaming_paused(self) -> bool:
@@ -63,6 +93,51 @@ class StreamEventManager(QObject):
 
         return self.stream_reader.is_streaming_paused
 
+    @property
+    def refresh_interval(self) -> float:
+        """Seconds between refreshes of the screen that frames are displayed on"""
+        widget = self.parent()
+        if isinstance(widget, QWidget) and widget.window().windowHandle() is not None:
+            screen = widget.window().windowHandle().screen()
+        else:
+            screen = QGuiApplication.primaryScreen()
+
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if refresh_rate <= 0:
+            refresh_rate = self.DEFAULT_REFRESH_RATE
+
+        return 1 / refresh_rate
+
+    def deliver_pending(self) -> None:
+        """Hand out the latest frame, if one arrived while the widget couldn't be
+        seen. To be called when the widget becomes visible again"""
+        if self._frame_pending:
+            self._deliver_events()
+
+    def set_display_size(self, display_size: Optional[Tuple[int, int]]) -> None:
+        """Let the SyncedStreamReader know how large its frames are displayed, so it
+        can avoid sending frames that are larger than necessary"""
+        self._display_size = display_size
+
+        if self.stream_reader is not None:
+            self.stream_reader.set_display_size(self, display_size)
+
+    def set_live_mode(self, live_mode: bool) -> None:
+        """Switch between handing out frames synced with their results, and handing
+        out the newest frames with extrapolated results"""
+        if live_mode == self._live_mode:
+            return
+
+        self._live_mode = live_mode
+
+        if self.stream_reader is not None:
+            self.stream_reader.set_live_mode(self, live_mode)
+
+            # Switch to the other kind of frame straight away
+            if self._latest_frame() is not None:
+                self._frame_pending = True
+                self._deliver_events()
+
     def change_stream(self, stream_conf: StreamConfiguration) -> None:
         if self.stream_reader is not None:
             self.stop_streaming()
@@ -133,14 +208,29 @@ class StreamEventManager(QObject):
         self.stream_conf = None
 
     def _handle_frame_signal(self) -> None:
-        """Connected to the SyncedStreamReader"""
-        self._frame_event.set()
+        if self._live_mode or self.stream_reader is None:
+            return
+
+        self._frame_pending = True
+        self._deliver_events()
+
+    def _handle_live_frame_signal(self) -> None:
+        if not self._live_mode or self.stream_reader is None:
+            return
+
+        self._frame_pending = True
+        self._deliver_events()
 
     def _handle_status_signal(self) -> None:
-        self._status_event.set()
+        if self.stream_reader is None:
+            # Queued before the stream was unsubscribed from
+            return
+
+        self._status_pending = True
+        self._deliver_events()
 
     def _on_frame(self):
-        self._frame_event.clear()
+        self._frame_pending = False
 
         if self.stream_reader is None:
             logging.info(
@@ -148,7 +238,7 @@ class StreamEventManager(QObject):
                 f"frame event, but SyncedStreamReader is None")
             return
 
-        frame = self.stream_reader.latest_processed_frame
+        frame = self._latest_frame()
 
         if frame is None:
             logging.info(
@@ -159,7 +249,7 @@ class StreamEventManager(QObject):
         self.frame_received.emit(frame)
 
     def _on_state_change(self) -> None:
-        self._status_event.clear()
+        self._status_pending = False
 
         if self.stream_reader is None:
             logging.info(
@@ -185,12 +275,32 @@ class StreamEventManager(QObject):
         else:
             self.stream_error.emit()
 
-    def _process_events(self) -> None:
-        if self._frame_event.is_set():
-            self._on_frame()
-        if self._status_event.is_set():
+    def _deliver_events(self) -> None:
+        """Hand out pending events"""
+        if self._refresh_timer.isActive():
+            # A held back frame will be delivered along with any other events
+            return
+
+        if self._status_pending:
             self._on_state_change()
 
+        # Frames for hidden widgets are left pending until deliver_pending is called
+        # when the widget is shown again. Nothing is scheduled in the meantime
+        if not self._frame_pending or not self.is_displayed:
+            return
+
+        # Don't hand out more than one frame per display refresh. The newest frame
+        # is picked up once the refresh is over
+        since_last_delivery = time.perf_counter() - self._last_frame_delivery
+        refresh_interval = self.refresh_interval
+        if since_last_delivery < refresh_interval:
+            remaining_ms = (refresh_interval - since_last_delivery) * 1000
+            self._refresh_timer.start(max(round(remaining_ms), 1))
+            return
+
+        self._last_frame_delivery = time.perf_counter()
+        self._on_frame()
+
     def _unsubscribe_from_stream(self) -> None:
         """Remove the StreamEventManager's reference to the SyncedStreamReader after
         disconnecting the connected signals/slots.
@@ -207,10 +317,15 @@ class StreamEventManager(QObject):
             return
 
         self.stream_reader.frame_received.disconnect(self._handle_frame_signal)
+        self.stream_reader.live_frame_received.disconnect(
+            self._handle_live_frame_signal)
         self.stream_reader.stream_state_changed.disconnect(self._handle_status_signal)
 
-        self._frame_event.clear()
-        self._status_event.clear()
+        self.stream_reader.set_display_size(self, None)
+        self.stream_reader.set_live_mode(self, None)
+
+        self._frame_pending = False
+        self._status_pending = False
 
         self.stream_reader = None
 
@@ -222,7 +337,10 @@ class StreamEventManager(QObject):
 
         # Create the stream reader
         stream_manager = get_stream_manager()
-        stream_reader = stream_manager.start_streaming(stream_conf, stream_url)
+        stream_reader = stream_manager.start_streaming(
+            stream_conf, stream_url,
+            consumer=self, display_size=self._display_size,
+        )
 
         if stream_reader is None:
             # This will happen if we try to get a StreamReader for a stream that no
@@ -230,19 +348,32 @@ class StreamEventManager(QObject):
             # instant before it's deleted from the server. We don't want to do anything
             return
 
-        # Connect new signals
+        # Connect new signals. They're emitted from the reader's thread, so they're
+        # queued to this thread. Qt drops them if this object is deleted first
         stream_reader.frame_received.connect(self._handle_frame_signal)
+        stream_reader.live_frame_received.connect(self._handle_live_frame_signal)
         stream_reader.stream_state_changed.connect(self._handle_status_signal)
 
+        stream_reader.set_live_mode(self, self._live_mode)
+
         self.stream_reader = stream_reader
 
         # Don't wait for the first event to start displaying
-        latest_frame = self.stream_reader.latest_processed_frame
+        latest_frame = self._latest_frame()
         if latest_frame is not None:
-            self._on_frame()
+            if self.is_displayed:
+                self._on_frame()
+            else:
+                self._frame_pending = True
         else:
             self._on_state_change()
 
+    def _latest_frame(self) -> Optional[ZoneStatusFrame]:
+        """The stream's latest frame of the kind that is handed out"""
+        if self._live_mode:
+            return self.stream_reader.latest_live_frame
+        return self.stream_reader.latest_processed_frame
+
     @staticmethod
     def _get_stream_url(stream_conf: StreamConfiguration) -> Optional[str]:
         try:
@@ -1,18 +1,40 @@
-from typing import List, overload
+from typing import Dict, List, Optional, Tuple, overload
+from uuid import UUID
 
 import numpy as np
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QGraphicsScene, QWidget
 from brainframe.api import bf_codecs
 
-from brainframe_qt.api_utils.detection_tracks import DetectionTrack
+from brainframe_qt.api_utils.detection_tracks import DetectionTrack, \
+    interpolate_tracks
 from brainframe_qt.ui.resources.config import RenderSettings
-from brainframe_qt.ui.resources.video_items.detections import DetectionItem
+from brainframe_qt.ui.resources.video_items.detections import DetectionItem, \
+    DetectionOverlayItem
 from brainframe_qt.ui.resources.video_items.zone_statuses import \
     ZoneStatusItem
 
 
 class StreamGraphicsScene(QGraphicsScene):
+    """Shows a stream's frames, with its zones and detections drawn over them.
+
+    The overlay is retained between frames. Each frame is diffed against the
+    items already in the scene, which are keyed by track and zone ID and updated
+    in place, so only objects that appear or disappear cost new items.
+
+    With RenderSettings.batch_detections, detections are instead all drawn by a
+    single DetectionOverlayItem.
+    """
+
+    ZONE_Z_VALUE = 1
+    DETECTION_Z_VALUE = 2
+    """Items are kept across frames, so they're layered explicitly instead of by
+    the order they were added in"""
+
+    MAX_POOLED_DETECTION_ITEMS = 50
+    """Hidden DetectionItems kept for reuse beyond this are removed from the
+    scene"""
+
     def __init__(self, *, render_config: RenderSettings, parent: QWidget):
 
         super().__init__(parent)
@@ -21,24 +43,50 @@ class StreamGraphicsScene(QGraphicsScene):
 
         self.current_frame = None
 
+        self._detection_items: Dict[Optional[UUID], List[DetectionItem]] = {}
+        """Items for the detections currently shown, by track ID. Detections
+        without a track ID share the None key"""
+
+        self._detection_item_pool: List[DetectionItem] = []
+        """Hidden items left over from detections that went away, to be reused
+        for new ones"""
+
+        self._zone_status_items: Dict[int, ZoneStatusItem] = {}
+        """Items for the zones currently shown, by zone ID"""
+
+        self._detection_overlay_item: Optional[DetectionOverlayItem] = None
+        """Draws all detections at once, if batch_detections is enabled"""
+
+        self._init_style()
+
+    def _init_style(self) -> None:
+        # Overlay items move on every frame, which would keep a BSP index busy
+        # being rebuilt
+        self.setItemIndexMethod(QGraphicsScene.NoIndex)
+
     @overload
-    def set_frame(self, pixmap: QPixmap) -> None:
+    def set_frame(self, pixmap: QPixmap, scale: float = 1) -> None:
         ...
 
     @overload
     def set_frame(self, path: str) -> None:
         ...
 
-    def set_frame(self, *, pixmap=None, path=None) -> None:
+    def set_frame(self, *, pixmap=None, path=None, scale: float = 1) -> None:
+        """Set the current frame to the given pixmap
+
+        :param scale: Factor the pixmap is scaled up by, so that downscaled frames
+            cover the same scene area as full resolution ones
+        """
 
         if path is not None:
             pixmap = QPixmap(str(path))
 
-        """Set the current frame to the given pixmap"""
         # Create new QGraphicsPixmapItem if there isn't one
         if not self.current_frame:
-            current_frame_size = None
+            current_frame_rect = None
             self.current_frame = self.addPixmap(pixmap)
+            self.current_frame.setScale(scale)
 
             # Fixes BF-319: Clicking a stream, closing it, and reopening it
             # again resulted in a stream that wasn't displayed properly. This
@@ -54,42 +102,75 @@ class StreamGraphicsScene(QGraphicsScene):
 
         # Otherwise modify the existing one
         else:
-            current_frame_size = self.current_frame.pixmap().size()
+            current_frame_rect = self.current_frame.sceneBoundingRect()
             self.current_frame.setPixmap(pixmap)
+            self.current_frame.setScale(scale)
 
-        # Resize if the new pixmap has a different size than before
-        if current_frame_size != self.current_frame.pixmap().size():
+        # Resize if the new frame covers a different area than before
+        if current_frame_rect != self.current_frame.sceneBoundingRect():
             for view in self.views():
                 # There should only ever be one, but we'll iterate to be sure
                 # noinspection PyArgumentList
                 view.resizeEvent()
                 view.updateGeometry()
 
-    def draw_lines(self, zone_statuses):
-        # Draw all of the zones (except the default zone)
-        for zone_status in zone_statuses.values():
-            if zone_status.zone.name != bf_codecs.Zone.FULL_FRAME_ZONE_NAME:
-                if len(zone_status.zone.coords) == 2:
-                    self._new_zone_status_polygon(zone_status)
+    def draw_zone_statuses(self, zone_statuses: Dict[str, bf_codecs.ZoneStatus],
+                           *, lines: bool, regions: bool) -> None:
+        """Show the given zones (except the default zone), replacing the ones that
+        were shown before. Zones that were already shown are updated in place
+
+        :param lines: Whether to show line zones
+        :param regions: Whether to show region zones
+        """
+        stale_items = self._zone_status_items
+        self._zone_status_items = {}
 
-    def draw_regions(self, zone_statuses):
-        # Draw all of the zones (except the default zone)
         for zone_status in zone_statuses.values():
-            if zone_status.zone.name != bf_codecs.Zone.FULL_FRAME_ZONE_NAME:
-                if len(zone_status.zone.coords) > 2:
-                    self._new_zone_status_polygon(zone_status)
+            zone = zone_status.zone
+            if zone.name == bf_codecs.Zone.FULL_FRAME_ZONE_NAME:
+                continue
+            if len(zone.coords) == 2 and not lines:
+                continue
+            if len(zone.coords) > 2 and not regions:
+                continue
+
+            zone_status_item = stale_items.pop(zone.id, None)
+            if zone_status_item is None:
+                zone_status_item = self._new_zone_status_polygon(zone_status)
+            else:
+                zone_status_item.set_zone_status(zone_status)
+
+            self._zone_status_items[zone.id] = zone_status_item
+
+        for zone_status_item in stale_items.values():
+            self.removeItem(zone_status_item)
 
     def draw_detections(self, frame_tstamp: float,
-                        tracks: List[DetectionTrack]):
+                        tracks: List[DetectionTrack], *, extrapolate: bool = False):
+        """Show the given tracks' detections, replacing the ones that were shown
+        before
 
-        for track in tracks:
-            detection = track.get_interpolated_detection(frame_tstamp)
-            detection_item = DetectionItem(
-                detection,
-                track=track,
-                render_config=self.render_config
-            )
-            self.addItem(detection_item)
+        :param extrapolate: Whether to extrapolate detections that are older than
+            the frame, such as for frames displayed in live mode
+        """
+        interpolated = interpolate_tracks(tracks, frame_tstamp,
+                                          extrapolate=extrapolate)
+
+        if self.render_config.batch_detections:
+            self._clear_detection_items()
+            self._draw_detection_overlay(tracks, interpolated)
+        else:
+            self._clear_detection_overlay()
+            self._draw_detection_items(tracks, interpolated)
+
+    def clear_zone_statuses(self) -> None:
+        """Remove all zones from the overlay"""
+        self.draw_zone_statuses({}, lines=False, regions=False)
+
+    def clear_detections(self) -> None:
+        """Remove all detections from the overlay"""
+        self._clear_detection_items()
+        self._clear_detection_overlay()
 
     def remove_items(self, items, condition=any):
         for item in items:
@@ -101,16 +182,114 @@ class StreamGraphicsScene(QGraphicsScene):
         def condition(item):
             return item is not self.current_frame
 
-        self.remove_items(self.items(), condition)
+        # Only top-level items, as removing an item removes its children too
+        top_level_items = [item for item in self.items()
+                           if item.parentItem() is None]
+        self.remove_items(top_level_items, condition)
+
+        self._detection_items.clear()
+        self._detection_item_pool.clear()
+        self._zone_status_items.clear()
+        self._detection_overlay_item = None
+
+    def _draw_detection_items(
+            self, tracks: List[DetectionTrack],
+            interpolated: List[Tuple[bf_codecs.Detection, np.ndarray]]) -> None:
+        """Show detections with a DetectionItem each. Tracks that were already
+        shown keep their items, which are updated in place"""
+        stale_items = self._detection_items
+        self._detection_items = {}
+
+        # Update the items of tracks that are still shown
+        new_detections = []
+        for track, (detection, coords) in zip(tracks, interpolated):
+            track_id = detection.track_id
+
+            items_for_id = stale_items.get(track_id)
+            if items_for_id:
+                detection_item = items_for_id.pop()
+                detection_item.set_detection(detection, coords=coords, track=track)
+                self._detection_items.setdefault(track_id, []) \
+                    .append(detection_item)
+            else:
+                new_detections.append((track, detection, coords))
+
+        # Items of tracks that went away are reused for the ones that are new
+        for items_for_id in stale_items.values():
+            for detection_item in items_for_id:
+                self._release_detection_item(detection_item)
+
+        for track, detection, coords in new_detections:
+            detection_item = self._reuse_detection_item(detection, coords, track)
+            self._detection_items.setdefault(detection.track_id, []) \
+                .append(detection_item)
+
+    def _clear_detection_items(self) -> None:
+        for items_for_id in self._detection_items.values():
+            for detection_item in items_for_id:
+                self._release_detection_item(detection_item)
+
+        self._detection_items = {}
+
+    def _draw_detection_overlay(
+            self, tracks: List[DetectionTrack],
+            interpolated: List[Tuple[bf_codecs.Detection, np.ndarray]]) -> None:
+        """Show detections with a single DetectionOverlayItem"""
+        if self._detection_overlay_item is None:
+            self._detection_overlay_item = DetectionOverlayItem(
+                render_config=self.render_config
+            )
+            self._detection_overlay_item.setZValue(self.DETECTION_Z_VALUE)
+            self.addItem(self._detection_overlay_item)
+
+        detections = [detection for detection, _coords in interpolated]
+        coords = [coords for _detection, coords in interpolated]
+        self._detection_overlay_item.set_detections(detections, coords, tracks)
 
-    def _new_zone_status_polygon(self, zone_status):
+    def _clear_detection_overlay(self) -> None:
+        if self._detection_overlay_item is not None:
+            self._detection_overlay_item.set_detections([], [], [])
+
+    def _new_zone_status_polygon(self, zone_status) -> ZoneStatusItem:
         zone_status_item = ZoneStatusItem(
             zone_status,
             render_config=self.render_config
         )
+        zone_status_item.setZValue(self.ZONE_Z_VALUE)
 
         self.addItem(zone_status_item)
 
+        return zone_status_item
+
+    def _reuse_detection_item(self, detection: bf_codecs.Detection,
+                              coords: np.ndarray,
+                              track: DetectionTrack) -> DetectionItem:
+        """Get an item for a detection that isn't shown yet, from the pool if
+        there are any left"""
+        if self._detection_item_pool:
+            detection_item = self._detection_item_pool.pop()
+            detection_item.set_detection(detection, coords=coords, track=track)
+            detection_item.setVisible(True)
+        else:
+            detection_item = DetectionItem(
+                detection,
+                coords=coords,
+                track=track,
+                render_config=self.render_config
+            )
+            detection_item.setZValue(self.DETECTION_Z_VALUE)
+            self.addItem(detection_item)
+
+        return detection_item
+
+    def _release_detection_item(self, detection_item: DetectionItem) -> None:
+        """Hide an item that's no longer needed, keeping it for reuse"""
+        if len(self._detection_item_pool) < self.MAX_POOLED_DETECTION_ITEMS:
+            detection_item.setVisible(False)
+            self._detection_item_pool.append(detection_item)
+        else:
+            self.removeItem(detection_item)
+
     @property
     def _item_text_size(self):
         return int(self.height() / 50)
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QResizeEvent
+from PyQt5.QtGui import QResizeEvent, QShowEvent
 from PyQt5.QtWidgets import QWidget
 
 from brainframe.api.bf_codecs import StreamConfiguration
@@ -15,7 +15,7 @@ from .stream_widget_ui import StreamWidgetUI
 class StreamWidget(StreamWidgetUI):
     """Base widget that uses Stream object to get frames.
 
-    Makes use of a QTimer to get frames
+    Frames are pushed to the widget by its StreamEventManager
     """
 
     def __init__(self, *, parent: QWidget):
@@ -26,10 +26,15 @@ class StreamWidget(StreamWidgetUI):
         self._draw_lines: Optional[bool] = None
         self._draw_regions: Optional[bool] = None
         self._draw_detections: Optional[bool] = None
+        self._live_mode: Optional[bool] = None
+
+        self.stream_event_manager.set_live_mode(self.live_mode)
 
         self._init_signals()
 
     def _init_signals(self) -> None:
+        self.render_config.value_changed.connect(self._handle_render_config_change)
+
         self.stream_event_manager.frame_received.connect(self.on_frame)
 
         self.stream_event_manager.stream_initializing.connect(self.on_stream_init)
@@ -44,10 +49,25 @@ class StreamWidget(StreamWidgetUI):
         current_frame = self.scene().current_frame
 
         if current_frame is not None:
+            # The frame item is scaled up when the stream sends downscaled frames,
+            # so its scene rect is the stream's full resolution
+            frame_rect = current_frame.sceneBoundingRect()
+
             # EXTREMELY IMPORTANT LINE!
             # The sceneRect grows but never shrinks automatically
-            self.scene().setSceneRect(current_frame.boundingRect())
-            self.fitInView(current_frame.boundingRect(), Qt.KeepAspectRatio)
+            self.scene().setSceneRect(frame_rect)
+            self.fitInView(frame_rect, Qt.KeepAspectRatio)
+
+        viewport_size = self.viewport().size() * self.devicePixelRatioF()
+        self.stream_event_manager.set_display_size(
+            (viewport_size.width(), viewport_size.height())
+        )
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+
+        # Frames are held back while the widget is hidden
+        self.stream_event_manager.deliver_pending()
 
     @property
     def draw_lines(self) -> bool:
@@ -82,6 +102,21 @@ class StreamWidget(StreamWidgetUI):
     def draw_detections(self, draw_detections: bool):
         self._draw_detections = draw_detections
 
+    @property
+    def live_mode(self) -> bool:
+        """Whether the newest frames are shown as soon as they arrive, with
+        detections extrapolated from the latest results, instead of waiting for
+        each frame's results"""
+        if self._live_mode is None:
+            return self.render_config.live_mode
+        else:
+            return self._live_mode
+
+    @live_mode.setter
+    def live_mode(self, live_mode: Optional[bool]):
+        self._live_mode = live_mode
+        self.stream_event_manager.set_live_mode(self.live_mode)
+
     def change_stream(self, stream_conf: StreamConfiguration) -> None:
         self.stream_event_manager.change_stream(stream_conf)
 
@@ -95,8 +130,7 @@ class StreamWidget(StreamWidgetUI):
         self.scene().set_frame(path=":/images/streaming_stopped_png")
 
     def on_frame(self, frame: ZoneStatusFrame) -> None:
-        self.scene().remove_all_items()
-        self.scene().set_frame(pixmap=frame.frame)
+        self.scene().set_frame(pixmap=frame.pixmap, scale=frame.downscale_factor)
 
         # This frame has never been paired with ZoneStatuses from the server
         # so nothing should be rendered. This occurs when the server has
@@ -104,19 +138,25 @@ class StreamWidget(StreamWidgetUI):
         # server was unable to connect to the stream, or inference crashed
         # immediately on the first frame of processing
         if frame.zone_statuses is None:
+            self.scene().clear_zone_statuses()
+            self.scene().clear_detections()
             return
 
-        if self.draw_lines:
-            self.scene().draw_lines(frame.zone_statuses)
-
-        if self.draw_regions:
-            self.scene().draw_regions(frame.zone_statuses)
+        # The overlay is kept between frames, and only updated where it changed
+        self.scene().draw_zone_statuses(
+            frame.zone_statuses,
+            lines=self.draw_lines,
+            regions=self.draw_regions,
+        )
 
         if self.draw_detections:
             self.scene().draw_detections(
                 frame_tstamp=frame.tstamp,
-                tracks=frame.tracks
+                tracks=frame.tracks,
+                extrapolate=frame.frame_metadata.live,
             )
+        else:
+            self.scene().clear_detections()
 
     def on_stream_init(self) -> None:
         self.scene().remove_all_items()
@@ -133,3 +173,7 @@ class StreamWidget(StreamWidgetUI):
     def on_stream_paused(self) -> None:
         self.scene().remove_all_items()
         self.scene().set_frame(path=":/images/stream_paused_png")
+
+    def _handle_render_config_change(self, setting: str, _value: object) -> None:
+        if setting == "video_live_mode":
+            self.stream_event_manager.set_live_mode(self.live_mode)
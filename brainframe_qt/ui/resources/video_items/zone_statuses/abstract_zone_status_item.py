@@ -11,6 +11,8 @@ class AbstractZoneStatusItem:
     NORMAL_COLOR = AbstractZoneItem.BORDER_COLOR
     ALERTING_COLOR = QColor(255, 125, 0)
     BORDER_THICKNESS = AbstractZoneItem.BORDER_THICKNESS
+    DIMMED_OPACITY = 0.3
+    """Opacity of zones that have nothing happening in them"""
 
     def __init__(self, zone_status: ZoneStatus):
         self.zone_status = zone_status
@@ -37,6 +39,10 @@ class AbstractZoneStatusItem:
             if self.is_alert_active \
             else self.NORMAL_COLOR
 
+    @property
+    def highlight_opacity(self) -> float:
+        return 1 if self.should_highlight else self.DIMMED_OPACITY
+
     @property
     def should_highlight(self) -> bool:
         if self.is_alert_active:
@@ -1,6 +1,6 @@
-from typing import Optional, Union
+from typing import Hashable, Optional, Tuple, Union
 
-from brainframe.api.bf_codecs import ZoneStatus
+from brainframe.api.bf_codecs import Zone, ZoneStatus
 
 from brainframe_qt.ui.resources.config import RenderSettings
 from brainframe_qt.ui.resources.video_items.base import VideoItem
@@ -12,6 +12,8 @@ from .zone_status_region_item import ZoneStatusRegionItem
 
 
 class ZoneStatusItem(VideoItem):
+    """A zone and its status. Meant to be kept for as long as the zone is shown,
+    and given each new status of the zone with set_zone_status"""
 
     def __init__(self, zone_status: ZoneStatus, *,
                  render_config: RenderSettings,
@@ -29,6 +31,58 @@ class ZoneStatusItem(VideoItem):
             self.zone_item = self._init_region_polygon_item()
         self.zone_status_label_item = self._init_zone_status_label_item()
 
+        self._zone_definition = self.zone_definition(zone_status.zone)
+        self._status_fingerprint = self.status_fingerprint(zone_status)
+
+    def set_zone_status(self, zone_status: ZoneStatus) -> None:
+        """Show a new status of the zone in place.
+
+        The zone's shape and label are only rebuilt if the zone itself was changed,
+        and are only restyled if the status differs in a way that's shown.
+        """
+        if zone_status is self.zone_status:
+            # Frames between results share the same statuses
+            return
+
+        zone_definition = self.zone_definition(zone_status.zone)
+        status_fingerprint = self.status_fingerprint(zone_status)
+
+        self.zone_status = zone_status
+
+        if zone_definition != self._zone_definition:
+            self.scene().removeItem(self.zone_item)
+            self.scene().removeItem(self.zone_status_label_item)
+
+            if len(self.zone_status.zone.coords) == 2:
+                self.zone_item = self._init_line_line_item()
+            else:
+                self.zone_item = self._init_region_polygon_item()
+            self.zone_status_label_item = self._init_zone_status_label_item()
+        elif status_fingerprint != self._status_fingerprint:
+            self.zone_item.set_zone_status(zone_status)
+            self.zone_status_label_item.set_zone_status(zone_status)
+
+        self._zone_definition = zone_definition
+        self._status_fingerprint = status_fingerprint
+
+    @staticmethod
+    def zone_definition(zone: Zone) -> Hashable:
+        """Everything about a zone that its shape and label's position depend on"""
+        return zone.name, tuple(map(tuple, zone.coords))
+
+    @staticmethod
+    def status_fingerprint(zone_status: ZoneStatus) -> Tuple[Hashable, ...]:
+        """Everything about a zone status that its label text, colors and opacity
+        depend on"""
+        return (
+            tuple(sorted(zone_status.total_entered.items())),
+            tuple(sorted(zone_status.total_exited.items())),
+            tuple(sorted(zone_status.detection_within_counts.items())),
+            bool(zone_status.entering),
+            bool(zone_status.exiting),
+            bool(zone_status.alerts),
+        )
+
     def _init_region_polygon_item(self) -> ZoneRegionItem:
         region_polygon_item = ZoneStatusRegionItem(
             self.zone_status,
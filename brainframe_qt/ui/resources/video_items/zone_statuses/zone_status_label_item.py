@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import Dict, Optional
 
 import math
+from PyQt5.QtCore import QPointF
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QApplication
 from brainframe.api.bf_codecs import ZoneStatus
@@ -15,6 +16,10 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
     NORMAL_COLOR = QColor(0, 255, 125)
     ALERTING_COLOR = QColor(255, 125, 0)
 
+    _translations: Optional[Dict[str, str]] = None
+    """Translated text for the labels. The language doesn't change while the
+    client is running, so the text is only translated once"""
+
     def __init__(self, zone_status: ZoneStatus, *,
                  render_config: RenderSettings, parent: VideoItem):
         AbstractZoneStatusItem.__init__(self, zone_status)
@@ -24,6 +29,14 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
 
         self.render_config = render_config
 
+    def set_zone_status(self, zone_status: ZoneStatus) -> None:
+        """Show a new status of the zone, reusing this item"""
+        self.zone_status = zone_status
+
+        self.set_text(self.text)
+        self.set_background_color(self._background_color)
+        self.setPos(QPointF(*self._zone_pos))
+
     @property
     def text(self) -> str:
 
@@ -60,8 +73,7 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
         if not entered_counts:
             return None
 
-        entered_text = QApplication.translate("ZoneStatusLabelItem",
-                                              "Entering: ")
+        entered_text = self._translated_text()["entering"]
         count_text = self._count_dict_to_str(entered_counts)
         if not count_text:
             return None
@@ -75,8 +87,7 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
         if not exited_counts:
             return None
 
-        exited_text = QApplication.translate("ZoneStatusLabelItem",
-                                             "Exiting: ")
+        exited_text = self._translated_text()["exiting"]
         count_text = self._count_dict_to_str(exited_counts)
         if not count_text:
             return None
@@ -90,7 +101,7 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
         if not within_counts:
             return None
 
-        within_text = QApplication.translate("ZoneStatusLabelItem", "Within: ")
+        within_text = self._translated_text()["within"]
         count_text = self._count_dict_to_str(within_counts)
         if not count_text:
             return None
@@ -103,7 +114,22 @@ class ZoneStatusLabelItem(AbstractZoneStatusItem, LabelItem):
         if not self.zone_status.alerts:
             return None
 
-        return QApplication.translate("ZoneStatusLabelItem", "Alert!")
+        return self._translated_text()["alert"]
+
+    @classmethod
+    def _translated_text(cls) -> Dict[str, str]:
+        if cls._translations is None:
+            cls._translations = {
+                "entering": QApplication.translate("ZoneStatusLabelItem",
+                                                   "Entering: "),
+                "exiting": QApplication.translate("ZoneStatusLabelItem",
+                                                  "Exiting: "),
+                "within": QApplication.translate("ZoneStatusLabelItem",
+                                                 "Within: "),
+                "alert": QApplication.translate("ZoneStatusLabelItem", "Alert!"),
+            }
+
+        return cls._translations
 
     @staticmethod
     def _count_dict_to_str(count_dict: dict) -> str:
@@ -20,5 +20,11 @@ class ZoneStatusLineItem(AbstractZoneStatusItem, ZoneLineItem):
         self._init_style()
 
     def _init_style(self) -> None:
-        if not self.should_highlight:
-            self.setOpacity(0.3)
+        self.setOpacity(self.highlight_opacity)
+
+    def set_zone_status(self, zone_status: ZoneStatus) -> None:
+        """Restyle the line for a new status of the same zone"""
+        self.zone_status = zone_status
+
+        self.set_color(self.line_color)
+        self.setOpacity(self.highlight_opacity)
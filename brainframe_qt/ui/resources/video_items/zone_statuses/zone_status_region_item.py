@@ -21,5 +21,13 @@ class ZoneStatusRegionItem(AbstractZoneStatusItem, ZoneRegionItem):
 
     def _init_style(self) -> None:
         super()._init_style()
-        if not self.should_highlight:
-            self.setOpacity(0.3)
+        self.setOpacity(self.highlight_opacity)
+
+    def set_zone_status(self, zone_status: ZoneStatus) -> None:
+        """Restyle the region for a new status of the same zone"""
+        self.zone_status = zone_status
+
+        line_color = self.line_color
+        if line_color != self.border_color:
+            self.border_color = line_color
+        self.setOpacity(self.highlight_opacity)
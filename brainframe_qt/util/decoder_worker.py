@@ -0,0 +1,249 @@
+"""The side of a DecoderPool that runs in its worker processes.
+
+Workers import this module on their own, so it must only import gstly, numpy and
+brainframe_qt.util. Any of brainframe_qt's other packages would load the client's
+API and UI in every worker.
+"""
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gstly import gobject_init
+from gstly.stream_reader import GstStreamReader
+
+from brainframe_qt.util.events import EventWatcher
+
+
+class FrameSlots:
+    """The shared memory that one stream's frames are written to in a worker.
+
+    Slots are reused once the parent process has released them. If every slot is
+    in use, new frames are dropped until one is released. Frames are stored by the
+    stream's frame sender thread, and released by the worker's command loop.
+
+    The parent's frame buffer holds on to frames while they wait for their results,
+    so slots are only bounded by how many frames the buffer can hold. Released
+    slots beyond a few spares are freed, so that memory goes back down once the
+    buffer does.
+    """
+
+    SPARE_SLOTS = 5
+    """Slots on top of what the parent's buffer can hold, for frames in flight and
+    being displayed. Also the number of released slots that are kept for reuse"""
+
+    def __init__(self, max_buffer_bytes: int, min_buffered_frames: int):
+        """
+        :param max_buffer_bytes: Size of the parent's frame buffer budget
+        :param min_buffered_frames: Number of frames the parent's buffer holds on
+            to even when they're over budget
+        """
+        self._max_buffer_bytes = max_buffer_bytes
+        self._min_buffered_frames = min_buffered_frames
+
+        self._memory: List[Optional[SharedMemory]] = []
+        """Memory of each slot. None for slots that have been freed"""
+        self._free_slots: List[int] = []
+        """Released slots, with their memory still allocated"""
+        self._empty_slots: List[int] = []
+        """Slots that have been freed"""
+
+        self._slots_lock = Lock()
+
+    def store(self, frame: np.ndarray) -> Optional[Tuple[int, SharedMemory]]:
+        """Copy a frame into a free slot
+
+        :return: The slot and its memory, or None if there were no free slots
+        """
+        with self._slots_lock:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            elif self._num_slots_in_use < self._max_slots(frame.nbytes):
+                if self._empty_slots:
+                    slot = self._empty_slots.pop()
+                else:
+                    slot = len(self._memory)
+                    self._memory.append(None)
+            else:
+                return None
+
+            memory = self._memory[slot]
+            if memory is None or memory.size < frame.nbytes:
+                if memory is not None:
+                    # The stream's resolution went up
+                    self._unlink(memory)
+                memory = SharedMemory(create=True, size=frame.nbytes)
+                self._memory[slot] = memory
+
+        slot_array = np.ndarray(frame.shape, dtype=np.uint8, buffer=memory.buf)
+        np.copyto(slot_array, frame)
+
+        return slot, memory
+
+    def release(self, slot: int) -> Optional[str]:
+        """Make a slot available again once the parent is done with its frame
+
+        :return: The name of the slot's memory if it was freed, instead of being
+            kept for reuse
+        """
+        with self._slots_lock:
+            if len(self._free_slots) < self.SPARE_SLOTS:
+                self._free_slots.append(slot)
+                return None
+
+            memory = self._memory[slot]
+            self._unlink(memory)
+            self._memory[slot] = None
+            self._empty_slots.append(slot)
+            return memory.name
+
+    def close(self) -> None:
+        with self._slots_lock:
+            for memory in self._memory:
+                if memory is not None:
+                    self._unlink(memory)
+            self._memory.clear()
+            self._free_slots.clear()
+            self._empty_slots.clear()
+
+    @property
+    def _num_slots_in_use(self) -> int:
+        return len(self._memory) - len(self._free_slots) - len(self._empty_slots)
+
+    def _max_slots(self, frame_bytes: int) -> int:
+        """As many frames of this size as the parent's buffer can hold, plus
+        spares. The buffer always has room for a few frames, even when over
+        budget"""
+        buffered_frames = max(self._max_buffer_bytes // max(frame_bytes, 1),
+                              self._min_buffered_frames)
+        return buffered_frames + self.SPARE_SLOTS
+
+    @staticmethod
+    def _unlink(memory: SharedMemory) -> None:
+        memory.close()
+        memory.unlink()
+
+
+class WorkerStream:
+    """A stream being decoded in a worker process. Frames and status changes are
+    sent to the parent process as soon as the GstStreamReader has them"""
+
+    def __init__(self, stream_key: int, stream_reader_kwargs: Dict[str, Any],
+                 frame_slots: FrameSlots, send: Callable[[Tuple], None]):
+        self._stream_key = stream_key
+        self._send = send
+
+        self._frame_slots = frame_slots
+        self._reader = GstStreamReader(**stream_reader_kwargs)
+
+        self._event_watchers = [
+            EventWatcher(self._reader.new_frame_event, self._send_frame,
+                         name=f"Frame sender for stream {stream_key}"),
+            EventWatcher(self._reader.new_status_event, self._send_status,
+                         name=f"Status sender for stream {stream_key}"),
+        ]
+
+    def close(self) -> None:
+        """Close the GstStreamReader and free the stream's frame slots. Blocks until
+        the reader has closed"""
+        for event_watcher in self._event_watchers:
+            event_watcher.close()
+
+        self._reader.close()
+        self._reader.wait_until_closed()
+
+        self._frame_slots.close()
+
+    def release_slot(self, slot: int) -> None:
+        freed_memory_name = self._frame_slots.release(slot)
+        if freed_memory_name is not None:
+            self._send(("slot_freed", self._stream_key, slot, freed_memory_name))
+
+    def _send_frame(self) -> None:
+        tstamp, frame = self._reader.latest_frame
+
+        stored = self._frame_slots.store(frame)
+        if stored is None:
+            # The parent is holding on to every slot. Drop the frame
+            return
+
+        slot, memory = stored
+        self._send(("frame", self._stream_key, tstamp, slot, memory.name,
+                    frame.shape))
+
+    def _send_status(self) -> None:
+        self._send(("status", self._stream_key, self._reader.status))
+
+
+def worker_main(connection: Connection) -> None:
+    """Entrypoint of a worker process. Runs GstStreamReaders as instructed by the
+    parent process, and forwards their frames and status changes"""
+    gobject_init.start()
+
+    streams: Dict[int, WorkerStream] = {}
+
+    # Streams are closed in threads of their own, so that commands for other
+    # streams are still handled in the meantime
+    closing_threads: List[Thread] = []
+
+    send_lock = Lock()
+
+    def send(message: Tuple) -> None:
+        # Frames and statuses are sent from each stream's own threads
+        with send_lock:
+            try:
+                connection.send(message)
+            except OSError:
+                # The parent is gone. The command loop stops on its own
+                pass
+
+    def close_stream(stream_key_: int, stream_: Optional[WorkerStream]) -> None:
+        if stream_ is not None:
+            stream_.close()
+
+        send(("closed", stream_key_))
+
+    def start_closing_stream(stream_key_: int) -> None:
+        # Releases for the stream's slots are ignored from now on
+        stream_ = streams.pop(stream_key_, None)
+
+        thread = Thread(name=f"Stream closer for stream {stream_key_}",
+                        target=close_stream, args=(stream_key_, stream_),
+                        daemon=True)
+        thread.start()
+
+        closing_threads[:] = [thread_ for thread_ in closing_threads
+                              if thread_.is_alive()]
+        closing_threads.append(thread)
+
+    try:
+        while True:
+            command, *args = connection.recv()
+
+            if command == "open":
+                stream_key, stream_reader_kwargs, slot_limits = args
+                streams[stream_key] = WorkerStream(
+                    stream_key, stream_reader_kwargs, FrameSlots(**slot_limits),
+                    send)
+            elif command == "close":
+                start_closing_stream(*args)
+            elif command == "release":
+                stream_key, slot = args
+                if stream_key in streams:
+                    streams[stream_key].release_slot(slot)
+            elif command == "stop":
+                return
+    except (EOFError, BrokenPipeError):
+        # Parent process is gone
+        pass
+    finally:
+        # Streams close at the same time, instead of one after the other. The
+        # parent terminates the process if this takes too long
+        for stream_key in list(streams):
+            start_closing_stream(stream_key)
+        for thread in closing_threads:
+            thread.join()
+
+        gobject_init.close()
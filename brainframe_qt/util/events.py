@@ -1,33 +1,135 @@
 import threading
+from typing import Callable, ClassVar, Optional, Tuple
 
 
-def or_events(*events):
-    """Or multiple events together. Does not clear the underlying events"""
-    or_event = threading.Event()
+class NotifyingEvent(threading.Event):
+    """A threading.Event that also notifies the EventMultiplexers watching it when
+    it's set. Otherwise behaves exactly like a threading.Event.
 
-    def changed():
-        if any(e.is_set() for e in events):
-            or_event.set()
-        else:
-            or_event.clear()
+    Only events created as NotifyingEvents can be multiplexed. Events owned by
+    someone else (for example by gstly) can be mirrored onto one with an
+    EventWatcher.
+    """
 
-    def orify(e, changed_callback):
+    _watch_lock: ClassVar[threading.Lock] = threading.Lock()
+    """Serializes changes to the multiplexers watching any event"""
 
-        def or_set(event_):
-            event_.set_()
-            event_.changed()
+    def __init__(self):
+        super().__init__()
 
-        def or_clear(event_):
-            event_.clear_()
-            event_.changed()
+        self._multiplexers: Tuple[EventMultiplexer, ...] = ()
+        """Multiplexers to notify when the event is set. The tuple is replaced,
+        never modified, so it can be read without a lock"""
 
-        e.set_ = e.set
-        e.clear_ = e.clear
-        e.changed = changed_callback
-        e.set = lambda: or_set(e)
-        e.clear = lambda: or_clear(e)
+    def set(self) -> None:
+        super().set()
 
-    for event in events:
-        orify(event, changed)
-    changed()
-    return or_event
+        for multiplexer in self._multiplexers:
+            multiplexer._notify()
+
+    def _watch(self, multiplexer: "EventMultiplexer") -> None:
+        with self._watch_lock:
+            self._multiplexers = self._multiplexers + (multiplexer,)
+
+    def _unwatch(self, multiplexer: "EventMultiplexer") -> None:
+        with self._watch_lock:
+            self._multiplexers = tuple(
+                watcher for watcher in self._multiplexers
+                if watcher is not multiplexer
+            )
+
+
+class EventMultiplexer:
+    """Waits until any of several NotifyingEvents is set.
+
+    Setting a watched event notifies a Condition shared by the multiplexer, so
+    waiting takes no polling, and wakes up as soon as any of the events is set. The
+    events keep working as normal Events for everyone else.
+
+    Usable as a context manager, which stops watching the events on exit.
+    """
+
+    def __init__(self, *events: NotifyingEvent):
+        for event in events:
+            if not isinstance(event, NotifyingEvent):
+                raise TypeError(f"Can't watch events of type {type(event)}. Mirror "
+                                f"them onto a NotifyingEvent with an EventWatcher")
+
+        self._condition = threading.Condition()
+        self._events = events
+
+        for event in events:
+            event._watch(self)
+
+    def __enter__(self) -> "EventMultiplexer":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def is_set(self) -> bool:
+        """Whether any of the events is set"""
+        return any(event.is_set() for event in self._events)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until any of the events is set, or until the timeout expires.
+
+        :return: True if any of the events is set, False if the timeout expired
+        """
+        with self._condition:
+            return self._condition.wait_for(self.is_set, timeout)
+
+    def close(self) -> None:
+        """Stop watching the events"""
+        for event in self._events:
+            event._unwatch(self)
+
+    def _notify(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+
+class EventWatcher:
+    """Calls a function each time a threading.Event is set, from a thread of its own.
+
+    For events owned by someone else, which can't notify anyone when they're set.
+    The watcher takes over clearing the event: it's cleared before each call, so it
+    being set again during a call leads to another call, and no set is missed.
+    """
+
+    def __init__(self, event: threading.Event, callback: Callable[[], None],
+                 *, name: str):
+        """
+        :param event: The event to watch. Only the watcher may clear it
+        :param callback: Called each time the event is set
+        :param name: Name of the watcher's thread
+        """
+        self._event = event
+        self._callback = callback
+
+        self._closed = False
+        self._callback_lock = threading.RLock()
+        """Held while calling the callback, so that closing waits for it"""
+
+        self._thread = threading.Thread(name=name, target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop watching the event. Waits for a running callback to return, and the
+        callback is not called again afterwards"""
+        with self._callback_lock:
+            self._closed = True
+
+        # Wake the thread up. The event's owner is expected to be done with it
+        self._event.set()
+
+    def _run(self) -> None:
+        while True:
+            self._event.wait()
+
+            with self._callback_lock:
+                if self._closed:
+                    break
+
+                self._event.clear()
+                self._callback()
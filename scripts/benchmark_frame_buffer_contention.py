@@ -0,0 +1,181 @@
+"""Contention benchmark for SyncedFrameBuffer
+
+Runs N synthetic reader threads, each adding frames to and popping frames from its
+own SyncedFrameBuffer the way FrameSyncer does, and reports the combined frame
+throughput. The same workload is run on a copy of the previous SyncedFrameBuffer,
+whose buffers all share one lock, for comparison.
+
+Run from the root of the project:
+
+    QT_QPA_PLATFORM=offscreen python scripts/benchmark_frame_buffer_contention.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from threading import Barrier, RLock, Thread
+from typing import ClassVar, List, Optional, Type, Union
+from weakref import WeakSet
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+
+project_root = Path(__file__).parents[1].resolve()
+sys.path.insert(0, str(project_root))
+
+# The UI must be imported first to resolve the api_utils <-> ui import cycle
+# noinspection PyPep8,PyUnresolvedReferences
+import brainframe_qt.ui
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.frame_buffer import SyncedFrameBuffer
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.zone_status_frame import ZoneStatusFrame
+
+
+class BaselineFrameBuffer:
+    """A copy of SyncedFrameBuffer as it was before buffers got their own locks.
+    Every buffer shares one class-level lock, and checking whether the buffer is
+    full counts the frames in every buffer.
+
+    The max buffer size is a number of frames, and isn't read from the settings.
+    Its default of 300 frames is close to the current 1024 MB default at 720p.
+    """
+
+    GUARANTEED_BUFFER_SPACE: int = 30
+
+    _buffer_lock: ClassVar[RLock] = RLock()
+
+    _instances = WeakSet()  # type: ClassVar[WeakSet[BaselineFrameBuffer]]
+
+    _max_buffer_size: ClassVar[int] = 300
+
+    def __init__(self):
+        self._buffer: List[ZoneStatusFrame] = []
+        self._instances.add(self)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add_frame(self, frame: ZoneStatusFrame) -> None:
+        with self._buffer_lock:
+            self._buffer.append(frame)
+
+    @property
+    def is_empty(self) -> bool:
+        return not len(self)
+
+    @property
+    def is_full(self) -> bool:
+        return self._total_length >= self._max_buffer_size
+
+    @property
+    def needs_guaranteed_space(self) -> bool:
+        return len(self) < self.GUARANTEED_BUFFER_SPACE
+
+    def pop_oldest(self) -> Optional[ZoneStatusFrame]:
+        with self._buffer_lock:
+            if self.is_empty:
+                return None
+
+            return self._buffer.pop(0)
+
+    def pop_until(self, tstamp: float) -> Optional[ZoneStatusFrame]:
+        oldest_frame: Optional[ZoneStatusFrame] = None
+
+        with self._buffer_lock:
+            while True:
+                popped_frame = self.pop_if_older(tstamp)
+
+                if not popped_frame:
+                    break
+
+                oldest_frame = popped_frame
+
+        return oldest_frame
+
+    def pop_if_older(self, tstamp: float) -> Optional[ZoneStatusFrame]:
+        with self._buffer_lock:
+            if self.is_empty:
+                return None
+
+            oldest_frame = self._buffer[0]
+
+            if oldest_frame.tstamp < tstamp:
+                popped_frame = self.pop_oldest()
+                assert oldest_frame is popped_frame
+
+                return popped_frame
+            else:
+                return None
+
+    @property
+    def _total_length(self) -> int:
+        with self._buffer_lock:
+            return sum(map(len, self._instances))
+
+
+AnyFrameBuffer = Union[BaselineFrameBuffer, SyncedFrameBuffer]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 32],
+                        help="Numbers of reader threads to benchmark with")
+    parser.add_argument("--frames", type=int, default=20000,
+                        help="Number of frames each reader thread ingests")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    # StreamingSettings are QObjects
+    _app = QCoreApplication(sys.argv)
+
+    print(f"{'threads':<10}{'buffer':<14}{'frames/s':>14}")
+    for num_threads in args.threads:
+        for name, buffer_cls in [("baseline", BaselineFrameBuffer),
+                                 ("per-stream", SyncedFrameBuffer)]:
+            frames_per_sec = _run(buffer_cls, num_threads, args.frames)
+            print(f"{num_threads:<10}{name:<14}{frames_per_sec:>14,.0f}")
+
+
+def _run(buffer_cls: Type[AnyFrameBuffer], num_threads: int,
+         num_frames: int) -> float:
+    buffers = [buffer_cls() for _ in range(num_threads)]
+    barrier = Barrier(num_threads + 1)
+
+    threads: List[Thread] = [
+        Thread(target=_reader, args=(buffer, num_frames, barrier), daemon=True)
+        for buffer in buffers
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return num_threads * num_frames / elapsed
+
+
+def _reader(buffer: AnyFrameBuffer, num_frames: int, barrier: Barrier) -> None:
+    """Mimics the buffer operations FrameSyncer.sync performs for each frame"""
+    frame_data = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    barrier.wait()
+    for tstamp in range(num_frames):
+        buffer.add_frame(ZoneStatusFrame(frame=frame_data, tstamp=tstamp))
+
+        # Results arrive every few frames and lag a few frames behind
+        if tstamp % 5 == 0:
+            buffer.pop_until(tstamp - 10)
+        if buffer.pop_if_older(tstamp - 10) is None:
+            if buffer.is_full and not buffer.needs_guaranteed_space:
+                buffer.pop_oldest()
+
+
+if __name__ == '__main__':
+    main()
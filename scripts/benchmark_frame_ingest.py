@@ -0,0 +1,120 @@
+"""Micro-benchmark for the frame ingestion path
+
+Compares the legacy path (BGR -> RGB copy, then a QPixmap upload of every decoded
+frame) with the current one (the decoder's BGR buffer is wrapped as-is and only
+displayed frames are uploaded), reporting the bytes copied per decoded frame.
+
+Run from the root of the project:
+
+    QT_QPA_PLATFORM=offscreen python scripts/benchmark_frame_ingest.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+project_root = Path(__file__).parents[1].resolve()
+sys.path.insert(0, str(project_root))
+
+# The UI must be imported first to resolve the api_utils <-> ui import cycle
+# noinspection PyPep8,PyUnresolvedReferences
+import brainframe_qt.ui
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.zone_status_frame import ZoneStatusFrame
+
+RESOLUTIONS = {
+    "480p": (480, 640),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+}
+
+IngestFunc = Callable[[np.ndarray, bool], int]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=60,
+                        help="Number of decoded frames to push per resolution")
+    parser.add_argument("--shown-ratio", type=float, default=0.5,
+                        help="Fraction of decoded frames that leave the sync buffer "
+                             "and are displayed")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS),
+                        choices=list(RESOLUTIONS))
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    # QPixmaps need a QGuiApplication
+    _app = QApplication(sys.argv)
+
+    print(f"{'resolution':<12}{'path':<10}{'MB copied/frame':>18}{'ms/frame':>12}")
+    for resolution in args.resolutions:
+        height, width = RESOLUTIONS[resolution]
+        frames = _decoded_frames(height, width, args.frames)
+        shown = _shown_mask(args.frames, args.shown_ratio)
+
+        for name, ingest in [("legacy", _legacy_ingest),
+                             ("current", _current_ingest)]:
+            copied, elapsed = _run(ingest, frames, shown)
+            print(f"{resolution:<12}{name:<10}"
+                  f"{copied / len(frames) / 1e6:>18.2f}"
+                  f"{elapsed / len(frames) * 1000:>12.2f}")
+
+
+def _legacy_ingest(frame_bgr: np.ndarray, _shown: bool) -> int:
+    """Every decoded frame is channel-swapped and uploaded"""
+    frame_rgb = frame_bgr[..., ::-1].copy()
+
+    height, width, _ = frame_rgb.shape
+    image = QImage(frame_rgb.data, width, height, width * 3, QImage.Format_RGB888)
+    pixmap = QPixmap.fromImage(image)
+
+    return frame_rgb.nbytes + _pixmap_bytes(pixmap)
+
+
+def _current_ingest(frame_bgr: np.ndarray, shown: bool) -> int:
+    """Only displayed frames are uploaded, straight from the BGR buffer"""
+    if not shown:
+        return 0
+
+    pixmap = ZoneStatusFrame.pixmap_from_numpy_frame(frame_bgr)
+    return _pixmap_bytes(pixmap)
+
+
+def _run(ingest: IngestFunc, frames: List[np.ndarray], shown: List[bool]) \
+        -> Tuple[int, float]:
+    copied = 0
+
+    start = time.perf_counter()
+    for frame, is_shown in zip(frames, shown):
+        copied += ingest(frame, is_shown)
+    elapsed = time.perf_counter() - start
+
+    return copied, elapsed
+
+
+def _decoded_frames(height: int, width: int, count: int) -> List[np.ndarray]:
+    # A couple of distinct buffers is enough to defeat any caching
+    buffers = [np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+               for _ in range(2)]
+    return [buffers[i % len(buffers)] for i in range(count)]
+
+
+def _shown_mask(count: int, shown_ratio: float) -> List[bool]:
+    step = 1 / shown_ratio if shown_ratio else float("inf")
+    return [i % step < 1 for i in range(count)]
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+if __name__ == '__main__':
+    main()
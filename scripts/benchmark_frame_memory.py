@@ -0,0 +1,155 @@
+"""Memory benchmark for the per-frame objects on the streaming path
+
+Compares the legacy objects (dataclass ZoneStatusFrame and ZoneStatusFrameMeta
+with a timedelta latency, and tracks that copy a deque of (Detection, tstamp)
+tuples for every frame) with the current slot-based ones, whose track snapshots
+share a columnar history. Reports the Python heap memory retained per buffered
+frame, and the time taken to create each frame. Pixel data is excluded, as it's
+the same either way.
+
+Run from the root of the project:
+
+    QT_QPA_PLATFORM=offscreen python scripts/benchmark_frame_memory.py
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+project_root = Path(__file__).parents[1].resolve()
+sys.path.insert(0, str(project_root))
+
+# The UI must be imported first to resolve the api_utils <-> ui import cycle
+# noinspection PyPep8,PyUnresolvedReferences
+import brainframe_qt.ui
+# noinspection PyPep8
+from brainframe.api.bf_codecs import Detection
+# noinspection PyPep8
+from brainframe_qt.api_utils.detection_tracks import DetectionTrack
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.zone_status_frame import ZoneStatusFrame
+
+FrameFactory = Callable[[np.ndarray, float, list], object]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300,
+                        help="Number of frames kept alive at once, as in a "
+                             "stream's sync buffer")
+    parser.add_argument("--tracks", type=int, default=20,
+                        help="Number of tracks with a detection in each frame")
+    parser.add_argument("--history", type=int, default=100,
+                        help="Number of detections in each track's history")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    detection = Detection(
+        class_name="person",
+        coords=[[0, 0], [10, 0], [10, 20], [0, 20]],
+        children=[], attributes={}, with_identity=None, extra_data={},
+        track_id=None,
+    )
+    # Every frame shares one tiny image, so only per-frame objects are measured
+    image = np.zeros((1, 1, 3), dtype=np.uint8)
+
+    print(f"{'objects':<10}{'KB/frame':>12}{'us/frame':>12}")
+    for name, track_type, frame_factory in [
+        ("legacy", _LegacyDetectionTrack, _legacy_frame),
+        ("current", DetectionTrack, _current_frame),
+    ]:
+        tracks = []
+        for _ in range(args.tracks):
+            track = track_type()
+            for tstamp in range(args.history):
+                track.add_detection(detection, float(tstamp))
+            tracks.append(track)
+
+        retained, elapsed = _run(frame_factory, image, tracks, args.frames)
+        print(f"{name:<10}"
+              f"{retained / args.frames / 1e3:>12.2f}"
+              f"{elapsed / args.frames * 1e6:>12.1f}")
+
+
+def _run(frame_factory: FrameFactory, image: np.ndarray, tracks: list,
+         num_frames: int) -> Tuple[int, float]:
+    """Create frames while keeping them all alive
+
+    :return: Bytes retained by the frames, and the seconds taken to create them
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    frames = [frame_factory(image, float(tstamp), tracks)
+              for tstamp in range(num_frames)]
+    elapsed = time.perf_counter() - start
+
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del frames
+    return after - before, elapsed
+
+
+def _current_frame(image: np.ndarray, tstamp: float,
+                   tracks: List[DetectionTrack]) -> ZoneStatusFrame:
+    frame = ZoneStatusFrame(frame=image, tstamp=tstamp)
+    frame.tracks = [track.copy() for track in tracks]
+    frame.frame_metadata.analysis_latency_seconds = 0.1
+    return frame
+
+
+def _legacy_frame(image: np.ndarray, tstamp: float,
+                  tracks: List['_LegacyDetectionTrack']) -> '_LegacyFrame':
+    frame = _LegacyFrame(frame=image, tstamp=tstamp)
+    frame.tracks = [track.copy() for track in tracks]
+    frame.frame_metadata.analysis_latency = timedelta(seconds=0.1)
+    return frame
+
+
+@dataclass
+class _LegacyFrameMeta:
+    no_analysis: bool = False
+    analysis_latency: timedelta = timedelta(seconds=0)
+    client_buffer_full: bool = False
+
+
+@dataclass(eq=False)
+class _LegacyFrame:
+    frame: Optional[np.ndarray]
+    tstamp: float
+    zone_statuses: Optional[Dict] = None
+    tracks: Optional[list] = None
+    frame_metadata: _LegacyFrameMeta = field(default_factory=_LegacyFrameMeta)
+    downscale_factor: int = 1
+    compressed_frame: Optional[bytes] = None
+    _pixmap: None = field(default=None, init=False, repr=False)
+
+
+class _LegacyDetectionTrack:
+    def __init__(self, history=None, max_size=1000):
+        self._max_size = max_size
+        self._history: Deque[Tuple[Detection, float]] \
+            = history if history else deque(maxlen=max_size)
+
+    def add_detection(self, detection: Detection, tstamp: float) -> None:
+        self._history.appendleft((detection, tstamp))
+
+    def copy(self) -> '_LegacyDetectionTrack':
+        return _LegacyDetectionTrack(max_size=self._max_size,
+                                     history=self._history.copy())
+
+
+if __name__ == '__main__':
+    main()
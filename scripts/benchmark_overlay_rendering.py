@@ -0,0 +1,158 @@
+"""Benchmark for drawing detections over a stream's frames
+
+Compares the item-per-detection overlay (a DetectionItem, with its polygon, label
+and track items, for each detection) with the batched one (a single
+DetectionOverlayItem that paints every detection at once). Reports the time
+taken per frame to update the scene, and to paint it, headless.
+
+Run from the root of the project:
+
+    QT_QPA_PLATFORM=offscreen python scripts/benchmark_overlay_rendering.py
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Tuple
+from uuid import uuid4
+
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtWidgets import QApplication, QWidget
+
+project_root = Path(__file__).parents[1].resolve()
+sys.path.insert(0, str(project_root))
+
+# The UI must be imported first to resolve the api_utils <-> ui import cycle
+# noinspection PyPep8,PyUnresolvedReferences
+import brainframe_qt.ui
+# noinspection PyPep8
+from brainframe.api.bf_codecs import Detection
+# noinspection PyPep8
+from brainframe_qt.api_utils.detection_tracks import DetectionTrack
+# noinspection PyPep8
+from brainframe_qt.ui.resources.config import RenderSettings
+# noinspection PyPep8
+from brainframe_qt.ui.resources.settings import Setting
+# noinspection PyPep8
+from brainframe_qt.ui.resources.video_items.streams.stream_graphics_scene import \
+    StreamGraphicsScene
+
+FPS = 30
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--detections", type=int, default=150,
+                        help="Number of detections in each frame")
+    parser.add_argument("--frames", type=int, default=100,
+                        help="Number of frames to draw")
+    parser.add_argument("--history", type=int, default=FPS * 5,
+                        help="Number of earlier detections in each track")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1080),
+                        metavar=("WIDTH", "HEIGHT"))
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    _app = QApplication(sys.argv)
+
+    width, height = args.resolution
+    pixmap = QPixmap(width, height)
+    frames = _frames(args.detections, args.frames, args.history, width, height)
+
+    print(f"{'overlay':<10}{'update ms/frame':>18}{'paint ms/frame':>18}")
+    for name, batch_detections in [("items", False), ("batched", True)]:
+        update_time, paint_time = _run(pixmap, frames, batch_detections)
+        print(f"{name:<10}"
+              f"{update_time / len(frames) * 1000:>18.2f}"
+              f"{paint_time / len(frames) * 1000:>18.2f}")
+
+
+def _run(pixmap: QPixmap, frames: List[Tuple[float, List[DetectionTrack]]],
+         batch_detections: bool) -> Tuple[float, float]:
+    """Draw each frame's detections, then paint the scene
+
+    :return: Seconds taken to update the scene, and to paint it
+    """
+    parent = QWidget()
+    scene = StreamGraphicsScene(
+        render_config=_render_config(batch_detections=batch_detections),
+        parent=parent,
+    )
+    scene.set_frame(pixmap=pixmap)
+
+    target = QImage(pixmap.size(), QImage.Format_RGB32)
+    target_rect = QRectF(target.rect())
+
+    update_time = paint_time = 0.
+    for tstamp, tracks in frames:
+        start = time.perf_counter()
+        scene.draw_detections(tstamp, tracks)
+        update_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        painter = QPainter(target)
+        scene.render(painter, target_rect, target_rect)
+        painter.end()
+        paint_time += time.perf_counter() - start
+
+    return update_time, paint_time
+
+
+def _render_config(*, batch_detections: bool) -> SimpleNamespace:
+    """The default render settings, without reading or changing the ones saved for
+    the client"""
+    defaults = {attr: setting.default
+                for attr, setting in vars(RenderSettings).items()
+                if isinstance(setting, Setting)}
+    defaults["batch_detections"] = batch_detections
+
+    return SimpleNamespace(**defaults)
+
+
+def _frames(num_detections: int, num_frames: int, history: int,
+            width: int, height: int) -> List[Tuple[float, List[DetectionTrack]]]:
+    """Detections that wander around the frame, each with a track of its own"""
+    rand = random.Random(0)
+    class_names = ["person", "car", "bicycle", "dog"]
+
+    objects = [
+        SimpleNamespace(track=DetectionTrack(), track_id=uuid4(),
+                        class_name=rand.choice(class_names),
+                        x=rand.uniform(0, width - 100),
+                        y=rand.uniform(0, height - 200))
+        for _ in range(num_detections)
+    ]
+
+    frames = []
+    for frame_num in range(history + num_frames):
+        tstamp = frame_num / FPS
+        for obj in objects:
+            obj.x = min(max(obj.x + rand.uniform(-5, 5), 0), width - 100)
+            obj.y = min(max(obj.y + rand.uniform(-5, 5), 0), height - 200)
+            x, y = int(obj.x), int(obj.y)
+
+            detection = Detection(
+                class_name=obj.class_name,
+                coords=[[x, y], [x + 100, y], [x + 100, y + 200], [x, y + 200]],
+                children=[],
+                attributes={"behavior": "walking"},
+                with_identity=None,
+                extra_data={},
+                track_id=obj.track_id,
+            )
+            obj.track.add_detection(detection, tstamp)
+
+        if frame_num >= history:
+            frames.append((tstamp, [obj.track.copy() for obj in objects]))
+
+    return frames
+
+
+if __name__ == '__main__':
+    main()
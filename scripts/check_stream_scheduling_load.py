@@ -0,0 +1,109 @@
+"""Check that StreamManager runs fewer streams when the client is under load
+
+Samples CpuMonitor while Python threads keep the GIL busy, the way SyncedStreamReader
+threads do once there are too many streams, and feeds each sample to the same
+decision StreamManager makes every few seconds. The cap on running streams must
+shrink while under load, and grow back once the load is gone. Exits with a non-zero
+status otherwise.
+
+Run from the root of the project:
+
+    QT_QPA_PLATFORM=offscreen python scripts/check_stream_scheduling_load.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from threading import Event, Thread
+from typing import List
+
+project_root = Path(__file__).parents[1].resolve()
+sys.path.insert(0, str(project_root))
+
+# The UI must be imported first to resolve the api_utils <-> ui import cycle
+# noinspection PyPep8,PyUnresolvedReferences
+import brainframe_qt.ui
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.cpu_monitor import CpuMonitor
+# noinspection PyPep8
+from brainframe_qt.api_utils.streaming.stream_manager import StreamManager
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4,
+                        help="Number of Python threads keeping the GIL busy")
+    parser.add_argument("--samples", type=int, default=5,
+                        help="Number of CPU usage samples in each phase")
+    parser.add_argument("--sample-interval", type=float, default=0.5,
+                        help="Seconds between CPU usage samples")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    cpu_monitor = CpuMonitor()
+    num_wanted_streams = 100
+    max_active_streams = 20
+
+    stop_event = Event()
+    busy_threads = [Thread(target=_keep_busy, args=(stop_event,), daemon=True)
+                    for _ in range(args.threads)]
+    for thread in busy_threads:
+        thread.start()
+
+    print("Under load")
+    loaded_max = _run_phase(cpu_monitor, max_active_streams, num_wanted_streams,
+                            args.samples, args.sample_interval)
+
+    stop_event.set()
+    for thread in busy_threads:
+        thread.join()
+
+    print("Idle")
+    idle_max = _run_phase(cpu_monitor, loaded_max[-1], num_wanted_streams,
+                          args.samples, args.sample_interval)
+
+    if loaded_max[-1] >= max_active_streams:
+        sys.exit(f"FAIL: the cap did not shrink under load "
+                 f"({max_active_streams} -> {loaded_max[-1]})")
+    if idle_max[-1] <= loaded_max[-1]:
+        sys.exit(f"FAIL: the cap did not grow back once idle "
+                 f"({loaded_max[-1]} -> {idle_max[-1]})")
+
+    print("OK")
+
+
+def _run_phase(cpu_monitor: CpuMonitor, max_active_streams: int,
+               num_wanted_streams: int, num_samples: int,
+               sample_interval: float) -> List[int]:
+    """Sample the CPU usage and adjust the cap on running streams a few times
+
+    :return: The cap after each sample
+    """
+    cpu_monitor.sample()
+
+    caps = []
+    for _ in range(num_samples):
+        time.sleep(sample_interval)
+
+        cpu_usage = cpu_monitor.sample()
+        max_active_streams = StreamManager.next_max_active_streams(
+            max_active_streams, cpu_usage, num_wanted_streams=num_wanted_streams)
+        caps.append(max_active_streams)
+
+        print(f"  CPU usage {cpu_usage:>5.0%}, running up to "
+              f"{max_active_streams} streams")
+
+    return caps
+
+
+def _keep_busy(stop_event: Event) -> None:
+    """Pure Python work, which holds the GIL the whole time"""
+    while not stop_event.is_set():
+        sum(range(10_000))
+
+
+if __name__ == '__main__':
+    main()